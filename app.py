@@ -1,12 +1,17 @@
 import streamlit as st
 import pandas as pd
-import os
 import json
-from googlesearch import search
-from utils.data_fetcher import load_papers, get_cached_conferences, CONFERENCE_MAP, get_author_details
-from utils.search_engine import SearchEngine
-from utils.llm_interface import LLMInterface
-from utils.pdf_extractor import get_emails_from_pdf
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from utils.data_fetcher import load_papers, get_cached_conferences, CONFERENCE_MAP, get_author_resolver, sync_papers
+from utils.registry import get_registry
+from utils.federated import FederatedSearch
+from utils.enrichment import MAX_WORKERS, HostLimiter, enrich_recommendations, prefetch_profiles
+from utils.contact_job import load_contacts
+from utils.reranker import get_reranker, rerank_enabled
+from utils.tracing import TRACE_ENABLED, propagate, start_trace
+
+def split_interests(text):
+    return [part.strip() for part in text.split(",") if part.strip()]
 
 def deduplicate_recommendations(recommendations):
     seen = set()
@@ -22,6 +27,67 @@ def deduplicate_recommendations(recommendations):
         unique.append(rec)
     return unique
 
+def keep_trace(trace, limit=5):
+    # Traces of the last few steps, newest last, for the timing panel.
+    if trace is not None and trace.spans:
+        traces = st.session_state.setdefault('traces', [])
+        traces.append(trace)
+        del traces[:-limit]
+
+def render_timings(traces):
+    with st.expander("Timings"):
+        for trace in reversed(traces):
+            rows = trace.rows()
+            st.caption(f"{trace.name}: {rows[0]['duration_ms']:.0f} ms")
+            st.dataframe(
+                pd.DataFrame(rows),
+                hide_index=True,
+                column_config={
+                    "span": "Span",
+                    "start_ms": st.column_config.NumberColumn("Start (ms)", format="%.1f"),
+                    "duration_ms": st.column_config.NumberColumn("Duration (ms)", format="%.1f"),
+                    "attributes": "Attributes",
+                    "error": "Error",
+                }
+            )
+
+def render_recommendation(paper, i, live=False):
+    # live cards are drawn while the reply is still streaming and get redrawn
+    # as enrichment finishes, so they avoid keyed widgets.
+    with st.container(border=True):
+        paper_url = paper.get('url', '#')
+        st.markdown(f"### [{paper.get('title', '')}]({paper_url})")
+        
+        authors_formatted = []
+        for a in paper.get('authors', []):
+            name = a['name']
+            email = a.get('email')
+            twitter = a.get('twitter')
+            twitter_url = a.get('twitter_url')
+            
+            extras = []
+            if email:
+                extras.append(email)
+            if twitter and twitter_url:
+                extras.append(f"[@{twitter}]({twitter_url})")
+            else:
+                fallback_query = name.replace(' ', '+') + "+researcher+x.com"
+                fallback_url = f"https://www.google.com/search?q={fallback_query}"
+                extras.append(f"[X]({fallback_url})")
+            
+            authors_formatted.append(f"**{name}** ({', '.join(extras)})")
+        st.markdown(", ".join(authors_formatted))
+        
+        if 'keywords' in paper and paper['keywords']:
+            if live:
+                st.caption(" · ".join(paper['keywords']))
+            else:
+                pill_key = f"kw_{i}_{paper['title'][:10]}"
+                st.pills("Keywords", paper['keywords'], selection_mode="single", key=pill_key)
+        
+        st.markdown(f"**Why it's relevant:** {paper.get('relevance', '')}")
+        st.info(f"**Icebreaker:** {paper.get('icebreaker', '')}")
+
 st.set_page_config(page_title="Catalogger", layout="wide")
 
 if 'loaded_conferences' not in st.session_state:
@@ -74,6 +140,11 @@ with st.sidebar:
         list(CONFERENCE_MAP.keys())
     )
     
+    # Load the embedding model in the background while the user is still
+    # choosing, so the first search does not pay for it.
+    if conference in st.session_state.get('loaded_conferences', {}) or 'df' in st.session_state:
+        get_registry().warm_model_async()
+    
     if st.button("Load Conference Data", use_container_width=True):
         with st.spinner(f"Loading data for {conference}..."):
             try:
@@ -90,6 +161,27 @@ with st.sidebar:
             except Exception as e:
                 st.error(f"Error loading data: {e}")
 
+    if conference in st.session_state.get('loaded_conferences', {}):
+        if st.button("Refresh from OpenReview", use_container_width=True):
+            progress_bar = st.progress(0, text=f"Fetching papers changed since the last sync of {conference}...")
+            
+            def update_sync_progress(progress, text):
+                progress_bar.progress(progress, text=text)
+            
+            try:
+                df = sync_papers(conference, progress_callback=update_sync_progress)
+                progress_bar.empty()
+                get_registry().invalidate(conference)
+                st.session_state['df'] = df
+                st.session_state['conference'] = conference
+                st.session_state.pop('se_conf', None)
+                st.session_state['loaded_conferences'][conference] = len(df)
+                st.session_state['success_msg'] = f"{conference} is up to date ({len(df)} papers)."
+                st.rerun()
+            except Exception as e:
+                progress_bar.empty()
+                st.error(f"Error refreshing data: {e}")
+
     if 'success_msg' in st.session_state:
         st.success(st.session_state['success_msg'])
         del st.session_state['success_msg']
@@ -113,36 +205,52 @@ with st.sidebar:
                         st.rerun()
                     except Exception as e:
                         st.error(f"Error loading data: {e}")
+        
+        if len(sorted_confs) > 1:
+            st.toggle("Search all loaded conferences", key="federated_search")
     else:
         st.caption("No papers loaded.")
     
     st.divider()
+    st.toggle("Trace timings", value=TRACE_ENABLED, key="trace_timings",
+              help="Time each stage of loading, search, recommendations and contact lookups.")
     st.caption("Vibe coded by [@aryanguptacs](https://x.com/aryanguptacs) using Gemini 3 Pro.")
     
+# Federated search holds a lease on every conference it searched; hand them
+# back as soon as the mode is switched off so idle indexes can be evicted.
+if not st.session_state.get('federated_search') and 'federated' in st.session_state:
+    st.session_state.pop('federated').release()
+
 if 'df' in st.session_state:
     df = st.session_state['df']
     
     if 'search_engine' not in st.session_state or st.session_state.get('se_conf') != st.session_state['conference']:
-        se = SearchEngine()
+        registry = get_registry()
+        conference_name = st.session_state['conference']
         
-        safe_name = st.session_state['conference'].replace(" ", "_").lower()
-        emb_path = os.path.join("data", f"{safe_name}_embeddings.pkl")
-        needs_indexing = not os.path.exists(emb_path)
+        previous_lease = st.session_state.pop('search_lease', None)
+        if previous_lease is not None:
+            previous_lease.release()
         
-        if needs_indexing:
-            progress_bar = st.progress(0, text="Initializing semantic search engine...")
-            
-            def update_progress(progress, text):
-                progress_bar.progress(progress, text=text)
+        with start_trace("load index", enabled=st.session_state.get('trace_timings', False)) as trace:
+            if registry.needs_indexing(df, conference_name):
+                progress_bar = st.progress(0, text="Initializing semantic search engine...")
                 
-            se.load_data(df, st.session_state['conference'], progress_callback=update_progress)
-            progress_bar.empty()
-        else:
-            with st.spinner("Loading cached search index..."):
-                se.load_data(df, st.session_state['conference'])
-            
-        st.session_state['search_engine'] = se
-        st.session_state['se_conf'] = st.session_state['conference']
+                def update_progress(progress, text):
+                    progress_bar.progress(progress, text=text)
+                    
+                lease = registry.acquire(conference_name, df, progress_callback=update_progress)
+                progress_bar.empty()
+            else:
+                with st.spinner("Loading cached search index..."):
+                    lease = registry.acquire(conference_name, df)
+        keep_trace(trace)
+        
+        st.session_state['search_lease'] = lease
+        st.session_state['search_engine'] = lease.engine
+        st.session_state['df'] = lease.engine.df
+        st.session_state['se_conf'] = conference_name
+        get_author_resolver().index(lease.engine.df)
     
     if 'interests_input' not in st.session_state:
         st.session_state['interests_input'] = ""
@@ -160,13 +268,55 @@ if 'df' in st.session_state:
         key="interests_input"
     )
     
+    with st.expander("Filters"):
+        facets = st.session_state['search_engine'].facets
+        st.multiselect(
+            "Keywords",
+            [label for label, _ in facets["keywords"].options(limit=5000)],
+            key="filter_keywords",
+            help="Only papers tagged with any of these keywords.",
+        )
+        st.text_input("Authors", key="filter_authors", placeholder="Comma-separated names",
+                      help="Only papers by any of these authors.")
+        unknown_authors = [name for name in split_interests(st.session_state.get('filter_authors', ""))
+                           if not facets["authors"].has(name)]
+        if unknown_authors and not st.session_state.get('federated_search'):
+            st.caption(f"No papers in {st.session_state['conference']} by: {', '.join(unknown_authors)}")
+        if st.session_state.get('federated_search'):
+            st.multiselect("Conferences", sorted(get_cached_conferences()), key="filter_conferences",
+                           help="Search only these conferences (all loaded ones when empty).")
+    
+    def search_filters():
+        filters = {
+            "keywords": st.session_state.get('filter_keywords', []),
+            "authors": split_interests(st.session_state.get('filter_authors', "")),
+        }
+        return {facet: values for facet, values in filters.items() if values} or None
+    
     def run_search():
         if not interests:
             st.error("Please enter your interests.")
             return
         
         se = st.session_state['search_engine']
-        candidates = se.search(interests, top_k=50)
+        parts = split_interests(interests)
+        filters = search_filters()
+        with start_trace("search", enabled=st.session_state.get('trace_timings', False)) as trace:
+            if st.session_state.get('federated_search'):
+                if 'federated' not in st.session_state:
+                    st.session_state['federated'] = FederatedSearch(get_registry())
+                conferences = st.session_state.get('filter_conferences') or None
+                candidates = st.session_state['federated'].search(interests, top_k=50, conferences=conferences, filters=filters)
+            elif len(parts) > 1:
+                candidates = se.search_fused([interests] + parts, top_k=50, filters=filters)
+            else:
+                candidates = se.search(interests, top_k=50, filters=filters)
+        keep_trace(trace)
+        if candidates.empty:
+            st.session_state['candidates'] = None
+            st.session_state['recommendations'] = None
+            st.warning("No papers match the selected filters.")
+            return
         st.session_state['candidates'] = candidates
         
         st.session_state['recommendations'] = None
@@ -179,11 +329,15 @@ if 'df' in st.session_state:
         candidates = st.session_state['candidates']
         
         with st.expander("See raw candidate papers (Top 20)", expanded=True):
-            display_df = candidates[['title', 'authors', 'keywords', 'similarity_score', 'pdf_url']].head(20).copy()
+            display_columns = ['title', 'authors', 'keywords', 'similarity_score', 'pdf_url']
+            if 'conference' in candidates.columns:
+                display_columns.insert(0, 'conference')
+            display_df = candidates[display_columns].head(20).copy()
             display_df['similarity_score'] = display_df['similarity_score'].apply(lambda x: f"{x:.1%}")
             st.dataframe(
                 display_df,
                 column_config={
+                    "conference": "Conference",
                     "title": "Title",
                     "authors": "Authors",
                     "keywords": "Keywords",
@@ -199,91 +353,128 @@ if 'df' in st.session_state:
             previous_recs = st.session_state['recommendations'] if append_mode and isinstance(st.session_state.get('recommendations'), list) else None
             if api_key:
                 model_display = "Gemini 2.5 Pro" if api_provider == "Google Gemini" else "GPT-4o Mini via OpenRouter"
-                with st.spinner(f"Generating customized recommendations using {model_display}..."):
-                    llm = LLMInterface(api_provider, api_key)
-                    analysis_json = llm.analyze_papers(candidates, interests)
+                status = st.empty()
+                status.info(f"Generating customized recommendations using {model_display}...")
+                from utils.llm_interface import LLM_MODE, get_llm
+                from utils.json_stream import JsonArrayParser
+                llm = get_llm(api_provider, api_key)
+                
+                if 'conference' in candidates.columns:
+                    searched = candidates['conference'].unique()
+                else:
+                    searched = [st.session_state['conference']]
+                contacts = {}
+                for conf_name in searched:
+                    contacts.update(load_contacts(conf_name))
+                resolver = get_author_resolver()
+                
+                # Each recommendation is drawn as soon as its JSON object is
+                # complete and handed to enrichment straight away; its card is
+                # redrawn when the contact lookups come back.
+                live_area = st.empty()
+                live = live_area.container()
+                slots = []
+                recommendations = []
+                enriching = {}
+                enrich_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="catalogger-live")
+                # Shared by every per-recommendation call so the per-host
+                # limit covers the whole run.
+                lookup_limiter = HostLimiter()
+                lookup_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="catalogger-enrich")
+                
+                def show(i):
+                    with slots[i].container():
+                        render_recommendation(recommendations[i], i, live=True)
+                
+                # Filled from the enrichment threads: which cards gained
+                # contacts since they were last drawn, and how far along each
+                # card's lookups are.
+                updated = set()
+                lookup_progress = {}
+                
+                def report(i):
+                    def progress(fraction, text):
+                        lookup_progress[i] = fraction
+                        updated.add(i)
+                    return progress
+                
+                def collect(block=False):
+                    # Redraws cards as their lookups come back; with block,
+                    # keeps doing so until every enrichment has finished.
+                    while True:
+                        for future in [f for f in enriching if f.done()]:
+                            i = enriching.pop(future)
+                            try:
+                                future.result()
+                            except Exception as e:
+                                print(f"Enrichment failed for recommendation {i}: {e}")
+                            updated.add(i)
+                        for i in sorted(updated):
+                            updated.discard(i)
+                            show(i)
+                        if lookup_progress:
+                            overall = sum(lookup_progress.values()) / len(recommendations)
+                            status.info(f"Received {len(recommendations)} recommendations, fetched {overall:.0%} of author contacts...")
+                        if not block or not enriching:
+                            return
+                        wait(list(enriching), timeout=0.25, return_when=FIRST_COMPLETED)
+                
+                chunks = []
+                parser = JsonArrayParser()
+                trace = None
+                try:
+                    with start_trace("recommend", enabled=st.session_state.get('trace_timings', False)) as trace:
+                        finalists = candidates
+                        if rerank_enabled(st.secrets):
+                            status.info("Reranking candidates...")
+                            finalists = get_reranker().rerank(interests, candidates)
+                        if LLM_MODE == "sharded":
+                            finalists = llm.shortlist(finalists, interests, use_cache=not append_mode)
+                            status.info(f"Shortlisted {len(finalists)} papers, writing recommendations using {model_display}...")
+                        # One profile lookup for every paper the LLM can pick,
+                        # running while the reply streams in.
+                        profiles = None
+                        try:
+                            profiles = prefetch_profiles(resolver, finalists, lookup_pool)
+                        except Exception as e:
+                            print(f"Author profile lookup failed: {e}")
+                            resolver = None
+                        for chunk in llm.analyze_papers_stream(finalists, interests, use_cache=not append_mode):
+                            chunks.append(chunk)
+                            for rec in parser.feed(chunk):
+                                recommendations.append(rec)
+                                slots.append(live.empty())
+                                show(len(recommendations) - 1)
+                                future = enrich_pool.submit(propagate(enrich_recommendations), [rec], candidates,
+                                                            progress_callback=report(len(recommendations) - 1),
+                                                            contacts=contacts, resolver=resolver, profiles=profiles,
+                                                            limiter=lookup_limiter, executor=lookup_pool)
+                                enriching[future] = len(recommendations) - 1
+                                status.info(f"Received {len(recommendations)} recommendations, fetching author contacts...")
+                            collect()
+                        collect(block=True)
                     
+                    analysis_json = "".join(chunks)
                     if analysis_json.startswith("Error"):
                         st.session_state['recommendations'] = {"error": analysis_json}
+                    elif not recommendations and not parser.finished:
+                        st.session_state['recommendations'] = {"error": "Failed to parse AI response.", "raw": analysis_json}
                     else:
-                        try:
-                            cleaned_json = analysis_json.strip()
-                            if cleaned_json.startswith("```json"):
-                                cleaned_json = cleaned_json[7:]
-                            elif cleaned_json.startswith("```"):
-                                cleaned_json = cleaned_json[3:]
-                            if cleaned_json.endswith("```"):
-                                cleaned_json = cleaned_json[:-3]
-                            
-                            recommendations = json.loads(cleaned_json)
-                            
-                            progress_text = "Fetching author emails from PDFs..."
-                            enrich_bar = st.progress(0, text=progress_text)
-                            
-                            for p_idx, paper in enumerate(recommendations):
-                                enrich_bar.progress((p_idx) / len(recommendations), text=f"Fetching info for paper {p_idx+1}/{len(recommendations)}")
-                                paper_id = paper.get('id')
-                                if paper_id is not None:
-                                    try:
-                                        pid_int = int(paper_id)
-                                        if pid_int in candidates.index:
-                                            row = candidates.loc[pid_int]
-                                            paper_url = row.get('pdf_url', '#')
-                                            paper['url'] = paper_url
-                                            
-                                            if paper_url and paper_url != '#':
-                                                found_emails = get_emails_from_pdf(paper_url)
-                                                
-                                                for auth_obj in paper['authors']:
-                                                    auth_name = auth_obj['name']
-                                                    
-                                                    try:
-                                                        name_parts = auth_name.lower().split()
-                                                        if name_parts:
-                                                            last_name = name_parts[-1]
-                                                            last_name = "".join(c for c in last_name if c.isalnum())
-                                                            
-                                                            for email in found_emails:
-                                                                if last_name in email.lower():
-                                                                    auth_obj['email'] = email
-                                                                    break
-                                                    except:
-                                                        pass
-
-                                                    try:
-                                                        query = f"{auth_name} x.com"
-                                                        results = list(search(query, num_results=5))
-                                                        print(f"Twitter search for {auth_name}: {len(results)} results")
-                                                        found_handle = False
-                                                        for result in results:
-                                                            normalized = result.split('?')[0].rstrip('/')
-                                                            if "twitter.com" in normalized or "x.com" in normalized:
-                                                                parts = normalized.split('/')
-                                                                handle = parts[-1]
-                                                                if handle and handle.lower() not in ("home", "i", "login"):
-                                                                    auth_obj['twitter'] = handle
-                                                                    auth_obj['twitter_url'] = normalized
-                                                                    found_handle = True
-                                                                    break
-                                                        if not found_handle:
-                                                            print(f"No twitter found for {auth_name}. Results: {results}")
-                                                    except Exception as tw_err:
-                                                        print(f"Twitter search failed for {auth_name}: {tw_err}")
-
-                                    except Exception as e:
-                                        print(f"Error enriching paper {paper_id}: {e}")
-                            
-                            enrich_bar.empty()
-                            if previous_recs:
-                                combined = previous_recs + recommendations
-                            else:
-                                combined = recommendations
-                            st.session_state['recommendations'] = deduplicate_recommendations(combined)
-                            
-                        except json.JSONDecodeError:
-                            st.session_state['recommendations'] = {"error": "Failed to parse AI response.", "raw": analysis_json}
-                        except Exception as e:
-                            st.session_state['recommendations'] = {"error": f"An error occurred: {e}", "raw": analysis_json}
+                        if previous_recs:
+                            combined = previous_recs + recommendations
+                        else:
+                            combined = recommendations
+                        st.session_state['recommendations'] = deduplicate_recommendations(combined)
+                except json.JSONDecodeError:
+                    st.session_state['recommendations'] = {"error": "Failed to parse AI response.", "raw": "".join(chunks)}
+                except Exception as e:
+                    st.session_state['recommendations'] = {"error": f"An error occurred: {e}", "raw": "".join(chunks)}
+                finally:
+                    enrich_pool.shutdown(wait=False, cancel_futures=True)
+                    lookup_pool.shutdown(wait=False, cancel_futures=True)
+                    status.empty()
+                    live_area.empty()
+                    keep_trace(trace)
             else:
                 st.session_state['recommendations'] = "NO_API_KEY"
             
@@ -301,42 +492,16 @@ if 'df' in st.session_state:
                 st.markdown(recs["raw"])
         elif isinstance(recs, list):
             for i, paper in enumerate(recs):
-                with st.container(border=True):
-                    paper_url = paper.get('url', '#')
-                    st.markdown(f"### [{paper['title']}]({paper_url})")
-                    
-                    authors_formatted = []
-                    for a in paper['authors']:
-                        name = a['name']
-                        email = a.get('email')
-                        twitter = a.get('twitter')
-                        twitter_url = a.get('twitter_url')
-                        
-                        extras = []
-                        if email:
-                            extras.append(email)
-                        if twitter and twitter_url:
-                            extras.append(f"[@{twitter}]({twitter_url})")
-                        else:
-                            fallback_query = name.replace(' ', '+') + "+researcher+x.com"
-                            fallback_url = f"https://www.google.com/search?q={fallback_query}"
-                            extras.append(f"[X]({fallback_url})")
-                        
-                        authors_formatted.append(f"**{name}** ({', '.join(extras)})")
-                    st.markdown(", ".join(authors_formatted))
-                    
-                    if 'keywords' in paper and paper['keywords']:
-                        pill_key = f"kw_{i}_{paper['title'][:10]}"
-                        st.pills("Keywords", paper['keywords'], selection_mode="single", key=pill_key)
-                    
-                    st.markdown(f"**Why it's relevant:** {paper['relevance']}")
-                    st.info(f"**Icebreaker:** {paper['icebreaker']}")
+                render_recommendation(paper, i)
             
             if api_key:
                 if st.button("Generate more recommendations", use_container_width=True):
                     st.session_state['append_mode'] = True
                     st.session_state['run_llm'] = True
                     st.rerun()
+
+    if st.session_state.get('trace_timings') and st.session_state.get('traces'):
+        render_timings(st.session_state['traces'])
                 
 else:
     st.info("To begin, select a conference to search from.")
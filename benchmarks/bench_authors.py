@@ -0,0 +1,122 @@
+import argparse
+import contextlib
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import synthetic_papers
+from benchmarks.stubs import FakeProfileClient
+from utils.data_fetcher import AuthorResolver, split_authors
+from utils.enrichment import apply_profile_contacts, enrich_recommendations, prefetch_profiles
+
+def author_ids(df):
+    return [aid for row in df[['id', 'authors', 'author_emails']].to_dict('records') for _, aid in split_authors(row)]
+
+def recommendations_for(df):
+    # What the LLM hands back: the candidate's index and its author names.
+    return [{"id": i, "title": row['title'], "authors": [{"name": name.strip()} for name in row['authors'].split(",")]}
+            for i, row in df.iterrows()]
+
+def enrich(df, resolver, deadline=45.0):
+    fetched = []
+    lock = threading.Lock()
+
+    def fetch_emails(url):
+        with lock:
+            fetched.append(url)
+        return []
+
+    recs = recommendations_for(df)
+    start = time.perf_counter()
+    enrich_recommendations(recs, df, fetch_emails=fetch_emails, search_handles=lambda name: [],
+                           resolver=resolver, deadline=deadline)
+    return recs, fetched, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="AuthorResolver batching, caching and fallback against a stub profile client.")
+    parser.add_argument("--papers", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per get_profiles call")
+    args = parser.parse_args()
+
+    df = synthetic_papers(args.papers, abstract_words=20)
+    ids = list(dict.fromkeys(author_ids(df)))
+    report = {"papers": args.papers, "profiles": len(ids), "chunk_size": args.chunk_size, "checks": {}}
+    checks = report["checks"]
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(sys.stderr):
+        cache_path = os.path.join(tmp, "authors.json")
+
+        # One get_profiles call per author, the way profiles used to be looked up.
+        client = FakeProfileClient(latency=args.latency)
+        start = time.perf_counter()
+        AuthorResolver(client=client, cache_path=None, chunk_size=1).resolve(ids)
+        report["per_author_s"] = time.perf_counter() - start
+
+        client = FakeProfileClient(latency=args.latency)
+        resolver = AuthorResolver(client=client, cache_path=cache_path, chunk_size=args.chunk_size)
+        start = time.perf_counter()
+        emails = resolver.resolve(ids)
+        report["batched_s"] = time.perf_counter() - start
+        report["batched_calls"] = len(client.calls)
+        checks["batched_into_chunks"] = len(client.calls) == math.ceil(len(ids) / args.chunk_size)
+        checks["emails_match_profiles"] = all(
+            emails[aid] == (client.email_for(aid) if client.has_email(aid) else None) for aid in ids)
+
+        # Profiles without an email are cached too, so nothing is asked twice.
+        resolver.resolve(ids)
+        checks["warm_cache_no_calls"] = len(client.calls) == report["batched_calls"]
+        reloaded = FakeProfileClient()
+        AuthorResolver(client=reloaded, cache_path=cache_path, chunk_size=args.chunk_size).resolve(ids)
+        checks["cache_file_reused"] = not reloaded.calls
+        expired = FakeProfileClient()
+        AuthorResolver(client=expired, cache_path=cache_path, ttl=-1, chunk_size=args.chunk_size).resolve(ids)
+        checks["expired_cache_refetched"] = sum(len(call) for call in expired.calls) == len(ids)
+
+        # Enrichment with warm profiles: only papers with an author lacking an
+        # email go on to download their PDF.
+        resolver.index(df)
+        recs, fetched, report["enrich_warm_s"] = enrich(df, resolver)
+        incomplete = sum(1 for aids in resolver.authors_by_paper.values() if any(not client.has_email(a) for _, a in aids))
+        checks["complete_papers_skip_pdf"] = len(fetched) == incomplete
+
+        # One call per streamed recommendation, sharing one prefetch: still a
+        # single batched lookup for the whole candidate set.
+        streamed = FakeProfileClient()
+        shared = AuthorResolver(client=streamed, cache_path=None, chunk_size=len(ids))
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            profiles = prefetch_profiles(shared, df, pool)
+            for rec in recommendations_for(df):
+                enrich_recommendations([rec], df, fetch_emails=lambda url: [], search_handles=lambda name: [],
+                                       resolver=shared, profiles=profiles, executor=pool)
+        checks["streamed_calls_share_prefetch"] = len(streamed.calls) == 1
+
+        # A co-author sharing only the surname does not get the other's email.
+        paper = {"authors": [{"name": "Jane Smith"}, {"name": "John Smith"}]}
+        apply_profile_contacts(paper, {"jane  SMITH": "jane@example.org"})
+        checks["full_name_match_only"] = (paper["authors"][0].get("email") == "jane@example.org"
+                                          and "email" not in paper["authors"][1])
+
+        # Profile API down: every paper falls back to its PDF.
+        down = FakeProfileClient()
+        down.failing = True
+        recs, fetched, _ = enrich(df, AuthorResolver(client=down, cache_path=None, chunk_size=args.chunk_size))
+        checks["outage_falls_back_to_pdf"] = len(fetched) == len(df)
+
+        # Profile API hanging: enrichment still returns within its deadline.
+        slow = FakeProfileClient(latency=2.0)
+        _, fetched, report["slow_profiles_enrich_s"] = enrich(
+            df, AuthorResolver(client=slow, cache_path=None, chunk_size=len(ids)), deadline=0.5)
+        checks["slow_profiles_within_deadline"] = report["slow_profiles_enrich_s"] < 1.0
+
+    report["speedup"] = report["per_author_s"] / report["batched_s"]
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if all(checks.values()) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.common import synthetic_papers
+from utils.encoders import ENCODER_BACKENDS, encode_rows, load_model
+
+def fixed_batches(model, texts, batch_size=32):
+    # The original indexing loop: fixed 32-item batches in corpus order.
+    for i in range(0, len(texts), batch_size):
+        model.encode(texts[i : i + batch_size])
+
+def main():
+    parser = argparse.ArgumentParser(description="Papers/second for each indexing mode and encoder backend.")
+    parser.add_argument("--papers", type=int, default=20000)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--backends", nargs="+", default=list(ENCODER_BACKENDS), choices=ENCODER_BACKENDS)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    df = synthetic_papers(args.papers)
+    texts = (df['title'] + ". " + df['abstract']).tolist()
+    rows = np.arange(len(texts))
+    report = {"papers": args.papers, "model": args.model, "papers_per_s": {}}
+
+    for backend in args.backends:
+        try:
+            model = load_model(args.model, backend)
+        except Exception as e:
+            report["papers_per_s"][backend] = f"skipped: {e}"
+            continue
+
+        runs = {}
+        if backend == "torch":
+            start = time.perf_counter()
+            fixed_batches(model, texts)
+            runs["fixed_batches"] = args.papers / (time.perf_counter() - start)
+        for mode in ("serial", "parallel"):
+            start = time.perf_counter()
+            encode_rows(model, texts, rows, None, mode=mode, model_name=args.model, backend=backend, workers=args.workers)
+            runs[f"{mode}_length_sorted"] = args.papers / (time.perf_counter() - start)
+        report["papers_per_s"][backend] = runs
+        print(json.dumps({backend: runs}))
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
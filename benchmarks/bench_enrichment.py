@@ -0,0 +1,89 @@
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import requests
+
+from benchmarks.stubs import StubServer
+from utils import pdf_extractor
+from utils.enrichment import enrich_recommendations, match_author_email, parse_x_handle
+from utils.pdf_extractor import get_emails_from_pdf
+from utils.pdf_cache import PdfTextCache
+
+@contextmanager
+def fresh_pdf_cache():
+    # Each pass gets its own empty cache, so neither is answered from the
+    # other's downloads and nothing is written under data/.
+    cache_dir = tempfile.mkdtemp()
+    previous = pdf_extractor._cache
+    pdf_extractor._cache = PdfTextCache(cache_dir)
+    try:
+        yield
+    finally:
+        pdf_extractor._cache = previous
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+def make_inputs(base_url: str, n_papers: int, n_authors: int):
+    candidates = pd.DataFrame({"pdf_url": [f"{base_url}/pdf?id=p{i}" for i in range(n_papers)]})
+    recommendations = [
+        {"id": i, "title": f"Paper {i}", "authors": [{"name": f"Author{a} Smith"} for a in range(n_authors)]}
+        for i in range(n_papers)
+    ]
+    return recommendations, candidates
+
+def serial(recommendations, candidates, search):
+    # The loop app.py used to run: one PDF, then one search per author, in order.
+    for paper in recommendations:
+        url = candidates.loc[int(paper['id'])]['pdf_url']
+        emails = get_emails_from_pdf(url)
+        for author in paper['authors']:
+            email = match_author_email(author['name'], emails)
+            if email:
+                author['email'] = email
+            handle = parse_x_handle(search(author['name']))
+            if handle:
+                author.update(handle)
+
+def main():
+    parser = argparse.ArgumentParser(description="Wall time of serial vs concurrent contact enrichment against a local stand-in.")
+    parser.add_argument("--papers", type=int, default=5)
+    parser.add_argument("--authors", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    report = {"papers": args.papers, "latency_s": args.latency, "runs": []}
+    with StubServer(latency=args.latency) as server:
+        session = requests.Session()
+
+        def search(name):
+            return session.get(f"{server.base_url}/search", params={"q": f"{name} x.com"}, timeout=10).json()
+
+        for n_authors in args.authors:
+            recs, candidates = make_inputs(server.base_url, args.papers, n_authors)
+            with fresh_pdf_cache():
+                start = time.perf_counter()
+                serial(recs, candidates, search)
+                serial_s = time.perf_counter() - start
+
+            recs, candidates = make_inputs(server.base_url, args.papers, n_authors)
+            with fresh_pdf_cache():
+                start = time.perf_counter()
+                enrich_recommendations(recs, candidates, fetch_emails=get_emails_from_pdf, search_handles=search,
+                                       search_host="127.0.0.1-search")
+                concurrent_s = time.perf_counter() - start
+
+            run = {"authors_per_paper": n_authors, "serial_s": serial_s, "concurrent_s": concurrent_s,
+                   "speedup": serial_s / concurrent_s,
+                   "emails_found": sum(1 for p in recs for a in p['authors'] if a.get('email')),
+                   "handles_found": sum(1 for p in recs for a in p['authors'] if a.get('twitter'))}
+            report["runs"].append(run)
+            print(json.dumps(run))
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.common import WORDS, HashEncoder, stage, synthetic_papers
+
+def main():
+    parser = argparse.ArgumentParser(description="Filtered search through facet indexes vs post-filtering an unfiltered top-k with pandas.")
+    parser.add_argument("--papers", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--backend", default="exact", choices=["exact", "hnsw"])
+    parser.add_argument("--retrieval", default="hybrid", choices=["semantic", "hybrid"])
+    args = parser.parse_args()
+
+    from utils.facet_index import Facets
+    from utils.search_engine import RESULT_CACHE, SearchEngine
+
+    rng = random.Random(1)
+    queries = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8))) for _ in range(args.queries)]
+    df = synthetic_papers(args.papers)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                engine = SearchEngine(model_name="hash-encoder", model=HashEncoder(), index_backend=args.backend,
+                                      retrieval=args.retrieval)
+                start = time.perf_counter()
+                engine.load_data(df, "Facet Bench")
+                load_s = time.perf_counter() - start
+                start = time.perf_counter()
+                Facets.build(df)
+                facet_build_s = time.perf_counter() - start
+
+                report = {"papers": args.papers, "load_s": load_s, "facet_build_s": facet_build_s, "filters": {}}
+                keywords = engine.facets["keywords"].options()
+                # A common, a mid-frequency and a rare keyword.
+                for keyword, count in [keywords[0], keywords[len(keywords) // 2], keywords[-1]]:
+                    filters = {"keywords": [keyword]}
+                    RESULT_CACHE.clear()
+                    filtered, hits = [], []
+                    for q in queries:
+                        start = time.perf_counter()
+                        result = engine.search(q, top_k=args.top_k, filters=filters)
+                        filtered.append(time.perf_counter() - start)
+                        hits.append(len(result))
+
+                    RESULT_CACHE.clear()
+                    post, post_hits = [], []
+                    for q in queries:
+                        start = time.perf_counter()
+                        result = engine.search(q, top_k=args.top_k)
+                        result = result[result['keywords'].str.lower().str.contains(keyword.lower(), regex=False)]
+                        post.append(time.perf_counter() - start)
+                        post_hits.append(len(result))
+
+                    report["filters"][keyword] = {
+                        "matching_papers": count,
+                        "facet_filtered": dict(stage(filtered), mean_hits=sum(hits) / len(hits)),
+                        "post_filtered": dict(stage(post), mean_hits=sum(post_hits) / len(post_hits)),
+                    }
+        finally:
+            os.chdir(cwd)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
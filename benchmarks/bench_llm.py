@@ -0,0 +1,55 @@
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import synthetic_papers
+from benchmarks.stubs import StubServer
+from utils import llm_interface
+from utils.llm_interface import get_llm
+
+def candidates(n: int):
+    df = synthetic_papers(n, abstract_words=250)
+    df['similarity_score'] = np.linspace(0.9, 0.3, n)
+    return df
+
+def run(server: StubServer, fn):
+    before = dict(server.tokens)
+    requests = server.requests.get("/v1/chat/completions", 0)
+    start = time.perf_counter()
+    reply = fn()
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": elapsed,
+        "requests": server.requests.get("/v1/chat/completions", 0) - requests,
+        "prompt_tokens": server.tokens["prompt"] - before["prompt"],
+        "completion_tokens": server.tokens["completion"] - before["completion"],
+        "recommendations": len(json.loads(reply)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-call and sharded LLM analysis against a local OpenAI-compatible stub.")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--budget", type=int, default=None, help="prompt token budget for the single call (default: fit every candidate)")
+    parser.add_argument("--rate-limit-every", type=int, default=7, help="answer every N-th request with 429 + Retry-After")
+    args = parser.parse_args()
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp, StubServer(latency=0.2, rate_limit_every=args.rate_limit_every) as server:
+        llm_interface._cache.cache_dir = tmp
+        llm = get_llm("OpenRouter", "stub-key", base_url=f"{server.base_url}/v1")
+        assert llm is get_llm("OpenRouter", "stub-key", base_url=f"{server.base_url}/v1")
+        for top_k in args.top_k:
+            df = candidates(top_k)
+            budget = args.budget or 10 ** 9
+            report[top_k] = {
+                "single": run(server, lambda: llm.analyze_papers(df, "robot learning, sim-to-real", token_budget=budget, use_cache=False)),
+                "sharded": run(server, lambda: llm.analyze_papers_sharded(df, "robot learning, sim-to-real", use_cache=False)),
+            }
+        report["rate_limited_responses"] = server.completions // args.rate_limit_every if args.rate_limit_every else 0
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
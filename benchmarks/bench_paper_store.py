@@ -0,0 +1,59 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.common import summarize, synthetic_papers, time_calls
+from utils.paper_store import PaperStore
+
+SEARCH_COLUMNS = ["id", "title", "abstract"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CSV and columnar paper store load times.")
+    parser.add_argument("--papers", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "bench.csv")
+        synthetic_papers(args.papers).to_csv(csv_path, index=False)
+        store = PaperStore(tmp)
+
+        # "Cold" is the first read in this process (for the store that includes
+        # the one-time CSV migration); "warm" is every read after it.
+        start = time.perf_counter()
+        pd.read_csv(csv_path)
+        csv_cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.migrate_csv("bench", csv_path)
+        migrate = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.read("bench")
+        store_cold = time.perf_counter() - start
+
+        report = {
+            "papers": args.papers,
+            "csv_bytes": os.path.getsize(csv_path),
+            "arrow_bytes": os.path.getsize(store.path("bench")),
+            "cold": {
+                "read_csv_ms": csv_cold * 1000,
+                "migrate_ms": migrate * 1000,
+                "store_read_ms": store_cold * 1000,
+            },
+            "warm": {
+                "read_csv": summarize(time_calls(lambda: pd.read_csv(csv_path), args.repeat)),
+                "store_read": summarize(time_calls(lambda: store.read("bench"), args.repeat)),
+                "store_read_search_columns": summarize(time_calls(lambda: store.read("bench", columns=SEARCH_COLUMNS), args.repeat)),
+                "row_count_read_csv": summarize(time_calls(lambda: len(pd.read_csv(csv_path, usecols=['id'])), args.repeat)),
+                "row_count_manifest": summarize(time_calls(lambda: store.row_counts(), args.repeat)),
+            },
+        }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import json
+import shutil
+import tempfile
+import time
+
+from benchmarks.common import summarize
+from benchmarks.stubs import StubServer
+from utils import pdf_extractor
+from utils.pdf_cache import PdfTextCache
+
+def run(server, mode, papers):
+    # Fresh cache per run so every paper is actually downloaded.
+    cache_dir = tempfile.mkdtemp()
+    pdf_extractor._cache = PdfTextCache(cache_dir)
+    latencies, transferred, emails = [], [], 0
+    try:
+        for i in range(papers):
+            start = time.perf_counter()
+            entry = pdf_extractor.fetch_first_page(f"{server.base_url}/pdf?id={mode}{i}", mode=mode)
+            latencies.append(time.perf_counter() - start)
+            transferred.append(entry["bytes_transferred"])
+            emails += len(entry["emails"])
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return dict(summarize(latencies), mean_bytes=sum(transferred) / len(transferred), emails_found=emails)
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes and latency per paper: full download vs range reads.")
+    parser.add_argument("--papers", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=12, help="extra pages per PDF")
+    parser.add_argument("--page-bytes", type=int, default=400 * 1024, help="padding per extra page")
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    report = {"papers": args.papers}
+    with StubServer(latency=args.latency, pdf_pages=args.pages, pdf_padding=args.page_bytes) as server:
+        report["pdf_bytes"] = len(server.pdf_for("probe"))
+        report["full"] = run(server, "full", args.papers)
+        report["range"] = run(server, "range", args.papers)
+    with StubServer(latency=args.latency, pdf_pages=args.pages, pdf_padding=args.page_bytes, ranges=False) as server:
+        report["range_fallback_no_server_support"] = run(server, "range", args.papers)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
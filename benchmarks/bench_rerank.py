@@ -0,0 +1,59 @@
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import synthetic_papers
+from benchmarks.stubs import StubServer
+from utils import llm_interface
+from utils.llm_interface import PROMPT_TOKEN_BUDGET, get_llm
+from utils.reranker import RERANK_MODEL, Reranker
+
+QUERY = "reinforcement learning for robotics, sim-to-real transfer"
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end latency and LLM tokens with and without the cross-encoder rerank stage.")
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--top-n", type=int, default=15)
+    parser.add_argument("--model", default=RERANK_MODEL)
+    args = parser.parse_args()
+
+    df = synthetic_papers(args.candidates, abstract_words=250)
+    df['similarity_score'] = np.linspace(0.9, 0.3, args.candidates)
+    reranker = Reranker(args.model)
+
+    start = time.perf_counter()
+    reranker.model
+    load = time.perf_counter() - start
+    start = time.perf_counter()
+    finalists = reranker.rerank(QUERY, df, top_n=args.top_n)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    reranker.rerank(QUERY, df, top_n=args.top_n)
+    warm = time.perf_counter() - start
+
+    report = {"candidates": args.candidates, "top_n": args.top_n, "model": args.model,
+              "rerank": {"model_load_ms": load * 1000, "cold_ms": cold * 1000, "cached_ms": warm * 1000}}
+    with tempfile.TemporaryDirectory() as tmp, StubServer(latency=0.2) as server:
+        llm_interface._cache.cache_dir = tmp
+        llm = get_llm("OpenRouter", "stub-key", base_url=f"{server.base_url}/v1")
+        # With the default budget both prompts are about the same size (the
+        # reranked one keeps whole abstracts); without a budget the saving
+        # shows up in tokens as well.
+        for budget_name, budget in (("default_budget", PROMPT_TOKEN_BUDGET), ("no_budget", 10 ** 9)):
+            for name, papers, extra in (("vector_top_k", df, 0.0), ("reranked", finalists, cold)):
+                before = server.tokens["prompt"]
+                start = time.perf_counter()
+                llm.analyze_papers(papers, QUERY, token_budget=budget, use_cache=False)
+                elapsed = time.perf_counter() - start
+                report.setdefault(budget_name, {})[name] = {
+                    "llm_seconds": elapsed,
+                    "end_to_end_seconds": elapsed + extra,
+                    "prompt_tokens": server.tokens["prompt"] - before,
+                }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
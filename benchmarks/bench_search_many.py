@@ -0,0 +1,56 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.common import synthetic_papers, WORDS
+from utils.vector_index import ExactIndex
+from utils.embedding_store import normalize_rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of one-at-a-time vs batched query scoring.")
+    parser.add_argument("--papers", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--model", default=None, help="sentence-transformers model to include encoding cost (default: scoring only)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = [" ".join(rng.choice(WORDS, size=8)) for _ in range(args.queries)]
+
+    if args.model:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.model, device='cpu')
+        encode = lambda texts: model.encode(texts, normalize_embeddings=True)
+        df = synthetic_papers(args.papers)
+        embeddings = encode((df['title'] + ". " + df['abstract']).tolist())
+    else:
+        query_vectors = normalize_rows(rng.standard_normal((args.queries, args.dim)).astype(np.float32))
+        lookup = {q: query_vectors[i] for i, q in enumerate(queries)}
+        encode = lambda texts: np.stack([lookup[t] for t in texts])
+        embeddings = normalize_rows(rng.standard_normal((args.papers, args.dim)).astype(np.float32))
+
+    index = ExactIndex(embeddings)
+
+    start = time.perf_counter()
+    for q in queries:
+        index.search(encode([q]), args.top_k)
+    serial_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index.search(encode(queries), args.top_k)
+    batched_s = time.perf_counter() - start
+
+    print(json.dumps({
+        "papers": args.papers,
+        "queries": args.queries,
+        "includes_encoding": bool(args.model),
+        "serial_queries_per_s": args.queries / serial_s,
+        "batched_queries_per_s": args.queries / batched_s,
+        "speedup": serial_s / batched_s,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def app_modules() -> list:
+    # The repo modules app.py imports, at the top or inside a function, read
+    # from its source so the list cannot fall behind the app.
+    with open(os.path.join(REPO_ROOT, "app.py")) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        elif isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        else:
+            continue
+        modules.extend(name for name in names if name.split(".")[0] == "utils")
+    return list(dict.fromkeys(modules))
+
+# Reached only through the modules above, or (service) its own entry point.
+INDIRECT_MODULES = [
+    "utils.paper_store",
+    "utils.search_engine",
+    "utils.pdf_extractor",
+    "utils.service",
+]
+APP_MODULES = list(dict.fromkeys(app_modules() + INDIRECT_MODULES))
+# Heavy dependencies app.py must not import until a feature needs them.
+DEFERRED_MODULES = [
+    "sentence_transformers",
+    "torch",
+    "openreview",
+    "googlesearch",
+    "google.generativeai",
+    "openai",
+    "pypdf",
+]
+
+def import_cost_ms(module: str) -> float:
+    # Fresh interpreter per module so nothing is already in sys.modules.
+    code = f"import time; s = time.perf_counter(); import {module}; print((time.perf_counter() - s) * 1000)"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None
+    return float(proc.stdout.strip().splitlines()[-1])
+
+def leaked_modules() -> list:
+    # Which deferred dependencies get imported just by importing the app's modules.
+    code = (
+        "import sys; "
+        + "; ".join(f"import {m}" for m in APP_MODULES)
+        + f"; print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return [f"error: {proc.stderr.strip().splitlines()[-1] if proc.stderr else 'unknown'}"]
+    return [m for m in proc.stdout.strip().split(",") if m]
+
+def first_render_ms(timeout: float) -> float:
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return None
+    code = (
+        "import time; from streamlit.testing.v1 import AppTest; s = time.perf_counter(); "
+        f"AppTest.from_file('app.py', default_timeout={timeout}).run(); "
+        "print((time.perf_counter() - s) * 1000)"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None
+    return float(proc.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app import cost and time-to-first-render.")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if first render exceeds this many ms")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = {
+        "import_ms": {m: import_cost_ms(m) for m in APP_MODULES + DEFERRED_MODULES},
+        "deferred_modules_imported_at_startup": leaked_modules(),
+        "first_render_ms": first_render_ms(args.timeout),
+    }
+    report["total_benchmark_s"] = time.perf_counter() - start
+    print(json.dumps(report, indent=2))
+
+    failed = bool(report["deferred_modules_imported_at_startup"])
+    if args.budget_ms is not None and report["first_render_ms"] is not None:
+        failed = failed or report["first_render_ms"] > args.budget_ms
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
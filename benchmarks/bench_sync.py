@@ -0,0 +1,75 @@
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.stubs import FakeOpenReviewClient
+from utils.paper_store import PaperStore
+from utils.paper_sync import PaperSync, note_to_row
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {"seconds": elapsed, "peak_python_mb": peak / 2**20}
+
+def legacy_fetch(client: FakeOpenReviewClient, store: PaperStore):
+    # The previous behaviour: every note in memory, then one DataFrame.
+    notes = []
+    offset = 0
+    while True:
+        page = client.get_notes(limit=1000, offset=offset)
+        notes.extend(page)
+        offset += len(page)
+        if len(page) < 1000:
+            break
+    store.write("legacy", pd.DataFrame([note_to_row(note) for note in notes]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Time full, resumed and incremental OpenReview syncs against a fake client.")
+    parser.add_argument("--papers", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--edits", type=int, default=200)
+    args = parser.parse_args()
+
+    report = {}
+    for n in args.papers:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = PaperStore(tmp)
+            client = FakeOpenReviewClient(n)
+            sync = PaperSync(store, client, page_size=args.page_size)
+            _, legacy = measure(lambda: legacy_fetch(client, store))
+            _, full = measure(lambda: sync.sync("conf", "inv", mode="full"))
+
+            # Interrupt a second full sync half-way, then resume it.
+            client.calls = 0
+            client.fail_after = n // args.page_size // 2
+            try:
+                sync.sync("resumed", "inv", mode="full")
+            except ConnectionError:
+                pass
+            before = client.calls
+            stats, _ = measure(lambda: sync.sync("resumed", "inv", mode="full"))
+            resumed_pages = client.calls - before
+
+            client.edit([f"note{i:07d}" for i in range(0, n, max(n // args.edits, 1))][:args.edits])
+            client.add(args.edits // 4)
+            client.calls = 0
+            inc_stats, incremental = measure(lambda: sync.sync("conf", "inv", mode="incremental"))
+            report[n] = {
+                "legacy_fetch": legacy,
+                "streamed_full_sync": full,
+                "resume": {"pages_after_interrupt": resumed_pages, "rows": stats["rows"]},
+                "incremental": dict(incremental, pages=client.calls, **inc_stats),
+                "stored_rows": store.row_counts()["conf"],
+            }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
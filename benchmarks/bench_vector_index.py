@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import summarize
+from utils.embedding_store import normalize_rows
+from utils.vector_index import ExactIndex, HNSWIndex, hnswlib
+
+def clustered_vectors(n: int, dim: int, n_clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    assignments = rng.integers(0, n_clusters, size=n)
+    return normalize_rows(centers[assignments] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32))
+
+def legacy_search(embeddings: np.ndarray, query: np.ndarray, top_k: int) -> np.ndarray:
+    # What SearchEngine.search used to do: cosine_similarity re-normalizes every
+    # row per query, then a full argsort.
+    norms = np.linalg.norm(embeddings, axis=1)
+    similarities = (embeddings @ query[0]) / (norms * np.linalg.norm(query[0]))
+    return np.argsort(similarities)[::-1][:top_k]
+
+def per_query(fn, queries):
+    samples = []
+    results = []
+    for q in queries:
+        start = time.perf_counter()
+        results.append(fn(q[None, :]))
+        samples.append(time.perf_counter() - start)
+    return samples, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k and latency of the exact and HNSW vector indexes.")
+    parser.add_argument("--papers", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--ef-search", type=int, default=128)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = clustered_vectors(args.papers, args.dim, 200, rng)
+    queries = clustered_vectors(args.queries, args.dim, 200, rng)
+
+    exact = ExactIndex(embeddings)
+    legacy_samples, _ = per_query(lambda q: legacy_search(embeddings, q, args.top_k), queries)
+    exact_samples, exact_results = per_query(lambda q: exact.search(q, args.top_k)[1][0], queries)
+    report = {
+        "papers": args.papers,
+        "dim": args.dim,
+        "top_k": args.top_k,
+        "legacy_cosine_argsort": summarize(legacy_samples),
+        "exact": summarize(exact_samples),
+    }
+
+    if hnswlib is None:
+        report["hnsw"] = "skipped: hnswlib not installed"
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.hnsw")
+            start = time.perf_counter()
+            HNSWIndex.load_or_build(embeddings, path, "bench", ef_search=args.ef_search)
+            build_s = time.perf_counter() - start
+            start = time.perf_counter()
+            hnsw = HNSWIndex.load_or_build(embeddings, path, "bench", ef_search=args.ef_search)
+            load_s = time.perf_counter() - start
+
+            hnsw_samples, hnsw_results = per_query(lambda q: hnsw.search(q, args.top_k)[1][0], queries)
+            recall = np.mean([
+                len(set(approx.tolist()) & set(truth.tolist())) / len(truth)
+                for approx, truth in zip(hnsw_results, exact_results)
+            ])
+            report["hnsw"] = dict(summarize(hnsw_samples), build_ms=build_s * 1000, load_ms=load_s * 1000, ef_search=args.ef_search)
+            report[f"hnsw_recall@{args.top_k}"] = float(recall)
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
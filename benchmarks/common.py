@@ -0,0 +1,137 @@
+import hashlib
+import random
+import statistics
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+WORDS = (
+    "learning neural network transformer diffusion policy reinforcement robotics "
+    "language model graph attention optimization gradient sampling inference "
+    "benchmark dataset vision representation contrastive retrieval alignment "
+    "reward sim-to-real LoRA DPO quantization sparse kernel generalization "
+    "causal federated privacy uncertainty calibration agent planning memory"
+).split()
+
+def synthetic_papers(n_papers: int, abstract_words: int = 180, n_authors: int = 6, seed: int = 0) -> pd.DataFrame:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n_papers):
+        authors = [f"Author{rng.randrange(n_papers * 2)} Surname{rng.randrange(5000)}" for _ in range(rng.randint(1, n_authors))]
+        paper_id = f"syn{i:07d}"
+        rows.append({
+            "id": paper_id,
+            "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))).capitalize(),
+            "abstract": " ".join(rng.choice(WORDS) for _ in range(abstract_words)),
+            "authors": ", ".join(authors),
+            "author_emails": ", ".join(f"~{a.replace(' ', '_')}1" for a in authors),
+            "keywords": ", ".join(rng.sample(WORDS, 4)),
+            "pdf_url": f"https://openreview.net/pdf?id={paper_id}",
+        })
+    return pd.DataFrame(rows)
+
+# Deterministic stand-in for a SentenceTransformer so indexing and search can
+# be timed without downloading a model: each word maps to a fixed random
+# vector and a text is the sum of its words. Pass a real model instead for
+# numbers that include encoder cost.
+class HashEncoder:
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self._vectors = {}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def _word(self, word: str) -> np.ndarray:
+        vector = self._vectors.get(word)
+        if vector is None:
+            seed = int(hashlib.md5(word.encode("utf-8")).hexdigest()[:8], 16)
+            vector = self._vectors[word] = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return vector
+
+    def encode(self, texts: List[str], batch_size: int = 32, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                out[i] += self._word(word)
+        if normalize_embeddings:
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            out /= norms
+        return out
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "n": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+def stage(samples: List[float], items: Optional[int] = None) -> Dict[str, float]:
+    # Latency percentiles plus throughput in items per second (one item per
+    # sample unless items says otherwise).
+    total = sum(samples)
+    report = summarize(samples)
+    report["throughput_per_s"] = (items if items is not None else len(samples)) / total if total else 0.0
+    return report
+
+def time_calls(fn: Callable[[], object], repeat: int = 5) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def make_pdf(lines: List[str], extra_pages: int = 0, page_padding: int = 0) -> bytes:
+    # Smallest valid PDF with one text line per entry on page 1. extra_pages and
+    # page_padding bloat the file the way figures and later pages do in real
+    # papers, without adding anything to the first page.
+    def text_stream(text_lines):
+        parts = ["BT /F1 10 Tf 50 750 Td 12 TL"]
+        for line in text_lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            parts.append(f"({escaped}) Tj T*")
+        parts.append("ET")
+        return "\n".join(parts).encode("latin-1")
+
+    n_pages = 1 + extra_pages
+    page_ids = [4 + 2 * i for i in range(n_pages)]
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: f"<< /Type /Pages /Kids [{' '.join(f'{p} 0 R' for p in page_ids)}] /Count {n_pages} >>".encode(),
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    for i, page_id in enumerate(page_ids):
+        stream = text_stream(lines if i == 0 else [f"Page {i + 1}"])
+        if i > 0 and page_padding:
+            stream += b"\n%" + b"x" * page_padding
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {page_id + 1} 0 R >>"
+        ).encode()
+        objects[page_id + 1] = b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += f"{obj_id} 0 obj\n".encode() + objects[obj_id] + b"\nendobj\n"
+    xref_at = len(out)
+    size = max(objects) + 1
+    out += f"xref\n0 {size}\n0000000000 65535 f \n".encode()
+    for obj_id in range(1, size):
+        out += f"{offsets[obj_id]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode()
+    return bytes(out)
@@ -0,0 +1,129 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import requests
+
+from benchmarks.common import WORDS, HashEncoder, summarize, synthetic_papers
+
+CONFERENCE = "NeurIPS 2024"
+
+def client_loop(url: str, conference: str, top_k: int, stop_at: float, seed: int, latencies, errors, lock):
+    rng = random.Random(seed)
+    session = requests.Session()
+    mine = []
+    failed = 0
+    while time.time() < stop_at:
+        # A fresh query each time so the result cache does not answer it.
+        query = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8))) + f" {rng.random():.6f}"
+        start = time.perf_counter()
+        try:
+            response = session.get(f"{url}/search", params={"q": query, "conference": conference, "top_k": top_k}, timeout=30)
+            response.raise_for_status()
+            mine.append(time.perf_counter() - start)
+        except requests.RequestException:
+            failed += 1
+    with lock:
+        latencies.extend(mine)
+        errors.append(failed)
+
+def client_process(url: str, conference: str, top_k: int, duration: float, seeds):
+    latencies, errors, lock = [], [], threading.Lock()
+    began = time.time()
+    threads = [
+        threading.Thread(target=client_loop, args=(url, conference, top_k, began + duration, seed, latencies, errors, lock))
+        for seed in seeds
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, sum(errors), began, time.time()
+
+def run_load(url: str, conference: str, clients: int, processes: int, duration: float, top_k: int):
+    # Clients are spread over several processes so that the load generator's
+    # own Python overhead does not cap the measured rate. Spawned rather than
+    # forked, since the local server's threads are already running; the rate
+    # is measured from when the first client started, not from the spawn.
+    processes = max(1, min(processes, clients))
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [
+            pool.submit(client_process, url, conference, top_k, duration, list(range(p, clients, processes)))
+            for p in range(processes)
+        ]
+        results = [future.result() for future in futures]
+    elapsed = max(ended for _, _, _, ended in results) - min(began for _, _, began, _ in results)
+    latencies = [latency for samples, _, _, _ in results for latency in samples]
+    return dict(requests_per_s=len(latencies) / elapsed, errors=sum(failed for _, failed, _, _ in results), **summarize(latencies))
+
+def local_server(args, max_batch: int):
+    from utils.registry import EngineRegistry
+    from utils.service import serve
+
+    model = HashEncoder() if args.model is None else None
+    registry = EngineRegistry(model_name=args.model or "hash-encoder", model=model)
+    server = serve(port=0, conferences=[CONFERENCE], workers=args.workers, max_batch=max_batch,
+                   max_wait=args.batch_wait_ms / 1000, registry=registry)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Requests per second and latency of the headless search service under concurrent clients.")
+    parser.add_argument("--url", default=None, help="load-test a running service instead of starting one locally")
+    parser.add_argument("--conference", default=CONFERENCE)
+    parser.add_argument("--clients", type=int, default=16, help="concurrent client connections")
+    parser.add_argument("--processes", type=int, default=min(4, os.cpu_count() or 1), help="client processes")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--papers", type=int, default=20000, help="synthetic corpus size for the local service")
+    parser.add_argument("--workers", type=int, default=16, help="local service request workers")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--batch-wait-ms", type=float, default=3.0)
+    parser.add_argument("--compare", action="store_true", help="also run the local service with batching off")
+    parser.add_argument("--model", default=None, help="sentence-transformers model (default: a hashing stand-in)")
+    args = parser.parse_args()
+
+    report = {"config": vars(args), "runs": {}}
+    if args.url:
+        report["runs"]["remote"] = run_load(args.url, args.conference, args.clients, args.processes, args.duration, args.top_k)
+        report["runs"]["remote"]["service"] = requests.get(f"{args.url}/health", timeout=10).json()
+        print(json.dumps(report, indent=2))
+        return
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # The store and index caches write under the relative data/ dir.
+        os.chdir(tmp)
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                from utils.data_fetcher import get_paper_store, get_safe_name
+
+                df = synthetic_papers(args.papers)
+                get_paper_store().write(get_safe_name(CONFERENCE), df, conference=CONFERENCE)
+                settings = {"batched": args.max_batch}
+                if args.compare:
+                    settings["unbatched"] = 1
+                for name, max_batch in settings.items():
+                    server = local_server(args, max_batch)
+                    try:
+                        run = run_load(server.url, CONFERENCE, args.clients, args.processes, args.duration, args.top_k)
+                        run["service"] = server.service.stats()["batching"]
+                        report["runs"][name] = run
+                    finally:
+                        server.shutdown()
+                        server.server_close()
+                        server.service.close()
+        finally:
+            os.chdir(cwd)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
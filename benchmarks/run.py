@@ -0,0 +1,160 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmarks.common import WORDS, HashEncoder, stage, synthetic_papers
+from benchmarks.stubs import FakeOpenReviewClient, HttpNotesClient, StubServer
+
+CONFERENCE = "NeurIPS 2024"
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def make_queries(n: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8))) for _ in range(n)]
+
+def bench_sync(server: StubServer, args):
+    from utils.paper_store import PaperStore
+    from utils.paper_sync import PaperSync
+
+    server.openreview = FakeOpenReviewClient(args.papers, abstract_words=args.abstract_words, n_authors=args.authors)
+    client = HttpNotesClient(server.base_url)
+    pages = []
+    get_notes = client.get_notes
+
+    def timed_get_notes(**kwargs):
+        notes, elapsed = timed(lambda: get_notes(**kwargs))
+        pages.append(elapsed)
+        return notes
+
+    client.get_notes = timed_get_notes
+    sync = PaperSync(PaperStore("data"), client)
+    _, total = timed(lambda: sync.sync("sync_bench", "inv", mode="full"))
+    return {"pages": stage(pages), "total_s": total, "papers_per_s": args.papers / total}
+
+def bench_load_papers(args):
+    from utils.data_fetcher import get_paper_store, get_safe_name, load_papers
+
+    df = synthetic_papers(args.papers, abstract_words=args.abstract_words, n_authors=args.authors)
+    get_paper_store().write(get_safe_name(CONFERENCE), df, conference=CONFERENCE)
+    samples = [timed(lambda: load_papers(CONFERENCE))[1] for _ in range(args.repeat)]
+    return df, stage(samples, items=args.papers * args.repeat)
+
+def bench_indexing(df, args):
+    from utils.search_engine import SearchEngine
+
+    model = HashEncoder() if args.model is None else None
+    engine = SearchEngine(model_name=args.model or "hash-encoder", model=model, retrieval="hybrid")
+    _, cold = timed(lambda: engine.load_data(df, CONFERENCE))
+    warm_engine = SearchEngine(model_name=args.model or "hash-encoder", model=engine.model, retrieval="hybrid")
+    _, warm = timed(lambda: warm_engine.load_data(df, CONFERENCE))
+    return engine, {"cold_s": cold, "papers_per_s": len(df) / cold, "cached_reload_s": warm}
+
+def bench_search(engine, args):
+    from utils.search_engine import QUERY_EMBEDDING_CACHE, RESULT_CACHE
+
+    QUERY_EMBEDDING_CACHE.clear()
+    RESULT_CACHE.clear()
+    queries = make_queries(args.queries)
+    single = [timed(lambda: engine.search(q, top_k=50))[1] for q in queries]
+    cached = [timed(lambda: engine.search(q, top_k=50))[1] for q in queries]
+    RESULT_CACHE.clear()
+    QUERY_EMBEDDING_CACHE.clear()
+    batched = [timed(lambda: engine.search_many(make_queries(args.queries, seed=2), top_k=50))[1]]
+    return {
+        "uncached": stage(single),
+        "cached": stage(cached),
+        "search_many": stage(batched, items=args.queries),
+    }
+
+def bench_pdf(server: StubServer, args):
+    from utils.pdf_extractor import fetch_first_page
+
+    urls = [f"{server.base_url}/pdf?id=bench{i}" for i in range(args.pdfs)]
+    cold = [timed(lambda: fetch_first_page(url))[1] for url in urls]
+    warm = [timed(lambda: fetch_first_page(url))[1] for url in urls]
+    return {"cold": stage(cold), "cached": stage(warm), "bytes_sent": server.bytes_sent.get("/pdf", 0)}
+
+def bench_find_matches(engine, server: StubServer, args):
+    from utils import llm_interface
+    from utils.enrichment import enrich_recommendations
+    from utils.llm_interface import get_llm
+    from utils.search_engine import RESULT_CACHE
+
+    def search_handles(name):
+        return requests.get(f"{server.base_url}/search", params={"q": f"{name} x.com"}, timeout=10).json()
+
+    # Point every paper at the stub so enrichment downloads real (fake) PDFs.
+    engine.df['pdf_url'] = [f"{server.base_url}/pdf?id=flow{paper_id}" for paper_id in engine.df['id']]
+    llm = get_llm("OpenRouter", "stub-key", base_url=f"{server.base_url}/v1")
+    parts = {"search": [], "llm": [], "enrichment": [], "total": []}
+    for query in make_queries(args.rounds, seed=3):
+        RESULT_CACHE.clear()
+        start = time.perf_counter()
+        candidates, elapsed = timed(lambda: engine.search(query, top_k=50))
+        parts["search"].append(elapsed)
+        reply, elapsed = timed(lambda: llm.analyze_papers(candidates, query, use_cache=False))
+        parts["llm"].append(elapsed)
+        recommendations = json.loads(reply)
+        _, elapsed = timed(lambda: enrich_recommendations(recommendations, candidates, search_handles=search_handles,
+                                                          search_host="stub-search"))
+        parts["enrichment"].append(elapsed)
+        parts["total"].append(time.perf_counter() - start)
+    llm_interface._instances.clear()
+    return {name: stage(samples) for name, samples in parts.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every benchmark stage against a synthetic corpus and local stubs; prints JSON.")
+    parser.add_argument("--papers", type=int, default=5000)
+    parser.add_argument("--abstract-words", type=int, default=180)
+    parser.add_argument("--authors", type=int, default=6, help="maximum authors per paper")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--pdfs", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5, help="full search -> LLM -> enrichment runs")
+    parser.add_argument("--repeat", type=int, default=5, help="load_papers repetitions")
+    parser.add_argument("--latency", type=float, default=0.02, help="stub server latency per request (s)")
+    parser.add_argument("--llm-token-delay", type=float, default=0.001, help="stub LLM seconds per output token")
+    parser.add_argument("--model", default=None, help="sentence-transformers model (default: a hashing stand-in)")
+    parser.add_argument("--output", default=None, help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = {
+        "config": dict(vars(args), python=platform.python_version(), machine=platform.machine(), cpus=os.cpu_count()),
+        "stages": {},
+    }
+    stages = report["stages"]
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, StubServer(latency=args.latency, token_delay=args.llm_token_delay) as server:
+        # Every store and cache in utils writes under the relative data/ dir.
+        # Their progress messages go to stderr so stdout stays valid JSON.
+        os.chdir(tmp)
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                stages["openreview_sync"] = bench_sync(server, args)
+                df, stages["load_papers"] = bench_load_papers(args)
+                engine, stages["indexing"] = bench_indexing(df, args)
+                stages["search"] = bench_search(engine, args)
+                stages["pdf_extraction"] = bench_pdf(server, args)
+                stages["find_matches_to_enrichment"] = bench_find_matches(engine, server, args)
+        finally:
+            os.chdir(cwd)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    print(output)
+
+if __name__ == "__main__":
+    main()
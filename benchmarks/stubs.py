@@ -0,0 +1,297 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.common import WORDS, make_pdf
+
+# Local stand-in for the remote services the app talks to. Every route sleeps
+# for `latency` seconds first so concurrency effects are visible.
+#   GET /pdf?id=<paper id>      -> PDF whose first page lists author emails
+#                                  (honours Range and If-None-Match)
+#   GET /search?q=<query>       -> JSON list of result URLs (an x.com profile)
+#   GET /notes?offset=&limit=&mintmdate=
+#                               -> OpenReview API v2 style {"notes": [...]}
+#                                  page from server.openreview (a
+#                                  FakeOpenReviewClient); see HttpNotesClient
+#   POST /v1/chat/completions   -> OpenAI-compatible chat completion (also
+#                                  streamed as SSE); see llm_reply()
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body: bytes, content_type: str, headers=None):
+        self.server.count_bytes(urlparse(self.path).path, len(body))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        time.sleep(self.server.latency)
+        self.server.count(parsed.path)
+
+        if parsed.path == "/pdf":
+            paper_id = params.get("id", "paper")
+            body = self.server.pdf_for(paper_id)
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            byte_range = self.headers.get("Range", "")
+            if self.server.ranges and byte_range.startswith("bytes="):
+                start, _, end = byte_range[len("bytes="):].partition("-")
+                start = int(start)
+                end = min(int(end) if end else len(body) - 1, len(body) - 1)
+                self._send(206, body[start:end + 1], "application/pdf",
+                           {"ETag": etag, "Content-Range": f"bytes {start}-{end}/{len(body)}", "Accept-Ranges": "bytes"})
+                return
+            self._send(200, body, "application/pdf", {"ETag": etag})
+        elif parsed.path == "/notes" and self.server.openreview is not None:
+            notes = self.server.openreview.get_notes(
+                limit=int(params.get("limit", 1000)), offset=int(params.get("offset", 0)),
+                mintmdate=int(params["mintmdate"]) if "mintmdate" in params else None,
+            )
+            payload = {"notes": [{"id": n.id, "tmdate": n.tmdate, "content": n.content} for n in notes]}
+            self._send(200, json.dumps(payload).encode(), "application/json")
+        elif parsed.path == "/search":
+            name = params.get("q", "").replace(" x.com", "").replace(" ", "").lower()
+            self._send(200, json.dumps([f"https://x.com/{name}"]).encode(), "application/json")
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.server.count(parsed.path)
+        if parsed.path != "/v1/chat/completions":
+            self._send(404, b"not found", "text/plain")
+            return
+        if self.server.rate_limited():
+            self._send(429, json.dumps({"error": {"message": "rate limited"}}).encode(), "application/json",
+                       {"Retry-After": str(self.server.retry_after)})
+            return
+
+        prompt = body["messages"][-1]["content"]
+        reply = self.server.llm_reply(prompt)
+        # Prefill grows with the prompt, generation with the reply.
+        time.sleep(self.server.latency + self.server.prefill_per_token * len(prompt) / 4)
+        self.server.count_tokens(len(prompt) // 4, len(reply) // 4)
+        model = body.get("model", "stub")
+        if not body.get("stream"):
+            time.sleep(self.server.token_delay * len(reply) / 4)
+            completion = {
+                "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": reply}}],
+            }
+            self._send(200, json.dumps(completion).encode(), "application/json")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for start in range(0, len(reply), 16):
+            time.sleep(self.server.token_delay * 4)
+            chunk = {
+                "id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": None, "delta": {"content": reply[start:start + 16]}}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.05, pdf_pages: int = 0, pdf_padding: int = 0, ranges: bool = True,
+                 token_delay: float = 0.005, prefill_per_token: float = 0.0002, rate_limit_every: int = 0,
+                 retry_after: float = 0.2):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.latency = latency
+        self.pdf_pages = pdf_pages
+        self.pdf_padding = pdf_padding
+        self.ranges = ranges
+        self.token_delay = token_delay
+        self.prefill_per_token = prefill_per_token
+        # Every rate_limit_every-th completion request is answered with a 429.
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.openreview = None
+        self.requests = {}
+        self.bytes_sent = {}
+        self.tokens = {"prompt": 0, "completion": 0}
+        self.completions = 0
+        self._pdf_cache = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, path: str):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def count_bytes(self, path: str, n: int):
+        with self._lock:
+            self.bytes_sent[path] = self.bytes_sent.get(path, 0) + n
+
+    def count_tokens(self, prompt: int, completion: int):
+        with self._lock:
+            self.tokens["prompt"] += prompt
+            self.tokens["completion"] += completion
+
+    def rate_limited(self) -> bool:
+        with self._lock:
+            self.completions += 1
+            return bool(self.rate_limit_every) and self.completions % self.rate_limit_every == 0
+
+    @staticmethod
+    def llm_reply(prompt: str) -> str:
+        # Scoring prompts get a score for every "ID:" in them; anything else is
+        # answered with recommendations for the first few listed papers.
+        ids = re.findall(r"^\s*ID: (\S+)$", prompt, flags=re.MULTILINE)
+        titles = re.findall(r"^\s*Title: (.*)$", prompt, flags=re.MULTILINE)
+        if "Score each paper" in prompt:
+            return json.dumps([{"id": paper_id, "score": int(hashlib.md5(paper_id.encode()).hexdigest(), 16) % 11} for paper_id in ids])
+        recommendations = [{
+            "id": paper_id,
+            "title": title,
+            "authors": [{"name": "Alice Smith"}, {"name": "Bob Jones"}],
+            "keywords": ["retrieval", "alignment", "robotics"],
+            "relevance": "It studies the exact problem the user described, with a method that transfers to their setting.",
+            "icebreaker": "How sensitive were your results to the choice of benchmark?",
+        } for paper_id, title in list(zip(ids, titles))[:5]]
+        return json.dumps(recommendations, indent=2)
+
+    def pdf_for(self, paper_id: str) -> bytes:
+        with self._lock:
+            if paper_id not in self._pdf_cache:
+                lines = [f"Paper {paper_id}", "{alice.smith, bob.jones}@example.edu", "carol.wu@example.org"]
+                self._pdf_cache[paper_id] = make_pdf(lines, extra_pages=self.pdf_pages, page_padding=self.pdf_padding)
+            return self._pdf_cache[paper_id]
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+# In-process stand-in for openreview.api.OpenReviewClient.get_notes. Notes are
+# generated on demand from their index so the client itself stays small for
+# large conferences. edit() bumps tmdates; fail_after makes the next N-th page
+# request raise, to simulate a dropped connection.
+class FakeOpenReviewClient:
+    def __init__(self, n_papers: int, abstract_words: int = 180, n_authors: int = 6, start_ms: int = 1_700_000_000_000):
+        self.abstract_words = abstract_words
+        self.n_authors = n_authors
+        self.tmdates = {f"note{i:07d}": start_ms + i // 3 for i in range(n_papers)}
+        self.revision = {}
+        self.calls = 0
+        self.fail_after = None
+        self._clock = start_ms + n_papers
+
+    def edit(self, note_ids):
+        for note_id in note_ids:
+            self._clock += 1
+            self.tmdates[note_id] = self._clock
+            self.revision[note_id] = self.revision.get(note_id, 0) + 1
+
+    def add(self, n: int):
+        start = len(self.tmdates)
+        self.edit([f"note{i:07d}" for i in range(start, start + n)])
+
+    def _note(self, note_id: str):
+        rng = random.Random(note_id)
+        words = [rng.choice(WORDS) for _ in range(self.abstract_words)]
+        authors = [f"Author{rng.randrange(10000)} Surname{rng.randrange(5000)}" for _ in range(rng.randint(1, self.n_authors))]
+        revision = self.revision.get(note_id, 0)
+        content = {
+            "title": {"value": f"{' '.join(words[:8]).capitalize()} (rev {revision})"},
+            "abstract": {"value": " ".join(words)},
+            "authors": {"value": authors},
+            "authorids": {"value": [f"~{a.replace(' ', '_')}1" for a in authors]},
+            "keywords": {"value": rng.sample(WORDS, 4)},
+        }
+        return SimpleNamespace(id=note_id, content=content, tmdate=self.tmdates[note_id])
+
+    def get_notes(self, invitation=None, limit=1000, offset=0, sort="tmdate:asc", mintmdate=None, **kwargs):
+        self.calls += 1
+        if self.fail_after is not None:
+            self.fail_after -= 1
+            if self.fail_after < 0:
+                self.fail_after = None
+                raise ConnectionError("simulated connection reset")
+        ordered = sorted(self.tmdates, key=lambda note_id: (self.tmdates[note_id], note_id))
+        if mintmdate is not None:
+            ordered = [note_id for note_id in ordered if self.tmdates[note_id] >= mintmdate]
+        return [self._note(note_id) for note_id in ordered[offset:offset + limit]]
+
+# OpenReview profile lookups for AuthorResolver. Every get_profiles call sleeps
+# for `latency` and is recorded in calls; about one id in no_email_every has no
+# email on its profile, ids listed in missing have no profile at all, and
+# failing makes every call raise.
+class FakeProfileClient:
+    def __init__(self, latency: float = 0.0, no_email_every: int = 5, missing=()):
+        self.latency = latency
+        self.no_email_every = no_email_every
+        self.missing = set(missing)
+        self.failing = False
+        self.calls = []
+
+    @staticmethod
+    def email_for(profile_id: str) -> str:
+        return profile_id.strip("~").lower().replace("_", ".").rstrip("0123456789") + "@example.org"
+
+    def has_email(self, profile_id: str) -> bool:
+        return int(hashlib.sha1(profile_id.encode()).hexdigest(), 16) % self.no_email_every != 0
+
+    def get_profiles(self, ids):
+        self.calls.append(list(ids))
+        time.sleep(self.latency)
+        if self.failing:
+            raise ConnectionError("simulated profile API outage")
+        profiles = []
+        for profile_id in ids:
+            if profile_id in self.missing:
+                continue
+            emails = [self.email_for(profile_id)] if self.has_email(profile_id) else []
+            profiles.append(SimpleNamespace(id=profile_id, content={"emails": emails}))
+        return profiles
+
+# get_notes over HTTP against StubServer's /notes route, so syncs pay for
+# real requests and JSON decoding like they do against OpenReview.
+class HttpNotesClient:
+    def __init__(self, base_url: str):
+        import requests
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def get_notes(self, invitation=None, limit=1000, offset=0, sort="tmdate:asc", mintmdate=None, **kwargs):
+        params = {"invitation": invitation, "limit": limit, "offset": offset, "sort": sort}
+        if mintmdate is not None:
+            params["mintmdate"] = mintmdate
+        response = self.session.get(f"{self.base_url}/notes", params=params, timeout=30)
+        response.raise_for_status()
+        return [SimpleNamespace(**note) for note in response.json()["notes"]]
@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from utils.data_fetcher import DATA_DIR, get_safe_name, load_papers
+
+def contacts_path(conference_name: str) -> str:
+    return os.path.join(DATA_DIR, f"{get_safe_name(conference_name)}_contacts.arrow")
+
+def checkpoint_path(conference_name: str) -> str:
+    return os.path.join(DATA_DIR, f"{get_safe_name(conference_name)}_contacts.jsonl")
+
+def _read_checkpoint(path: str) -> Dict[str, Dict]:
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A run killed mid-write leaves at most one torn line.
+                continue
+            records[record["id"]] = record
+    return records
+
+def _read_table(path: str) -> Dict[str, Dict]:
+    if not os.path.exists(path):
+        return {}
+    table = feather.read_table(path, memory_map=True).to_pylist()
+    return {row["id"]: row for row in table}
+
+def _write_table(path: str, records: Dict[str, Dict]):
+    rows = sorted(records.values(), key=lambda r: r["id"])
+    table = pa.Table.from_pylist(rows, schema=pa.schema([
+        ("id", pa.string()),
+        ("pdf_url", pa.string()),
+        ("emails", pa.string()),
+        ("status", pa.string()),
+        ("fetched_at", pa.float64()),
+    ]))
+    tmp_path = path + ".tmp"
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+
+class RateLimiter:
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                time.sleep(self._next - now)
+                now = self._next
+            self._next = now + self.interval
+
+def _extract(paper_id: str, pdf_url: str) -> Dict:
+    from utils.pdf_extractor import fetch_first_page
+    try:
+        entry = fetch_first_page(pdf_url)
+        return {"id": paper_id, "pdf_url": pdf_url, "emails": ", ".join(sorted(entry["emails"])), "status": "ok", "fetched_at": time.time()}
+    except Exception as e:
+        return {"id": paper_id, "pdf_url": pdf_url, "emails": "", "status": f"error: {e}", "fetched_at": time.time()}
+
+# Extracts first-page emails for every paper in a conference into a sidecar
+# table keyed by paper id. Every result is appended to a JSONL checkpoint as it
+# arrives, so an interrupted run resumes where it stopped; failed papers are
+# retried on the next run. The checkpoint is compacted into the Arrow table at
+# the end.
+def run_contact_job(conference_name: str, workers: int = 4, rate: float = 4.0, limit: Optional[int] = None,
+                    progress_callback=None) -> Dict[str, int]:
+    df = load_papers(conference_name, columns=["id", "pdf_url"])
+    table_path, log_path = contacts_path(conference_name), checkpoint_path(conference_name)
+
+    records = _read_table(table_path)
+    records.update(_read_checkpoint(log_path))
+    done = {paper_id for paper_id, record in records.items() if record["status"] == "ok"}
+    todo = [(row.id, row.pdf_url) for row in df.itertuples() if row.id not in done and row.pdf_url]
+    if limit is not None:
+        todo = todo[:limit]
+    print(f"{conference_name}: {len(done)} papers already extracted, {len(todo)} to go")
+
+    limiter = RateLimiter(rate)
+    stats = {"ok": 0, "error": 0}
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with open(log_path, 'a') as log, ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        queue = iter(todo)
+        exhausted = False
+        while pending or not exhausted:
+            # Keep a small window in flight so the rate limit, not the pool
+            # queue, decides when requests go out.
+            while not exhausted and len(pending) < workers * 2:
+                item = next(queue, None)
+                if item is None:
+                    exhausted = True
+                    break
+                limiter.wait()
+                pending.add(pool.submit(_extract, *item))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record = future.result()
+                records[record["id"]] = record
+                log.write(json.dumps(record) + "\n")
+                log.flush()
+                stats["ok" if record["status"] == "ok" else "error"] += 1
+                if progress_callback:
+                    progress_callback(stats["ok"] + stats["error"], len(todo))
+
+    _write_table(table_path, records)
+    os.remove(log_path)
+    print(f"{conference_name}: extracted {stats['ok']} papers, {stats['error']} failed; wrote {table_path}")
+    return stats
+
+_contacts_cache = {}
+_contacts_lock = threading.Lock()
+
+def load_contacts(conference_name: str) -> Dict[str, List[str]]:
+    path = contacts_path(conference_name)
+    if not os.path.exists(path):
+        return {}
+    mtime = os.path.getmtime(path)
+    with _contacts_lock:
+        cached = _contacts_cache.get(conference_name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    table = feather.read_table(path, columns=["id", "emails", "status"], memory_map=True)
+    contacts = {
+        paper_id: [e for e in emails.split(", ") if e]
+        for paper_id, emails, status in zip(*(table.column(c).to_pylist() for c in ("id", "emails", "status")))
+        if status == "ok"
+    }
+    with _contacts_lock:
+        _contacts_cache[conference_name] = (mtime, contacts)
+    return contacts
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract author emails from every PDF in a cached conference.")
+    parser.add_argument("conference", help='conference name, e.g. "NeurIPS 2024"')
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=4.0, help="max PDF requests started per second")
+    parser.add_argument("--limit", type=int, default=None, help="only process this many remaining papers")
+    args = parser.parse_args()
+
+    def report(done, total):
+        if done % 50 == 0 or done == total:
+            print(f"  {done}/{total}")
+
+    run_contact_job(args.conference, workers=args.workers, rate=args.rate, limit=args.limit, progress_callback=report)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
-import openreview
 import pandas as pd
+import json
 import os
-from typing import List, Dict
+import threading
+from typing import List, Dict, Optional
 import time
+from utils.paper_store import PaperStore
+from utils.paper_sync import PaperSync
+from utils.tracing import span
 
 DATA_DIR = "data"
 
@@ -12,99 +16,244 @@ CONFERENCE_MAP = {
     "NeurIPS 2023": "NeurIPS.cc/2023/Conference/-/Submission", 
 }
 
+AUTHOR_CACHE_PATH = os.path.join(DATA_DIR, "author_profiles.json")
+AUTHOR_CACHE_TTL = 30 * 24 * 3600
+PROFILE_CHUNK_SIZE = 100
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_openreview_client():
+    # One client per process: it holds the HTTP session (and its pooled
+    # connections) and the auth token.
+    global _client
+    with _client_lock:
+        if _client is None:
+            import openreview
+            _client = openreview.api.OpenReviewClient(baseurl='https://api2.openreview.net')
+        return _client
+
+def get_safe_name(conference_name: str) -> str:
+    return conference_name.replace(" ", "_").lower()
+
 def get_local_file_path(conference_name: str) -> str:
-    safe_name = conference_name.replace(" ", "_").lower()
-    return os.path.join(DATA_DIR, f"{safe_name}.csv")
+    return os.path.join(DATA_DIR, f"{get_safe_name(conference_name)}.csv")
+
+def get_paper_store() -> PaperStore:
+    return PaperStore(DATA_DIR)
+
+def _migrate_legacy_csv(store: PaperStore, conference_name: str) -> Optional[pd.DataFrame]:
+    csv_path = get_local_file_path(conference_name)
+    if not os.path.exists(csv_path):
+        return None
+    print(f"Migrating {csv_path} to the columnar paper store...")
+    return store.migrate_csv(get_safe_name(conference_name), csv_path, conference=conference_name)
 
 def get_cached_conferences() -> Dict[str, int]:
+    store = get_paper_store()
+    counts = store.row_counts()
     cached = {}
     for conf_name in CONFERENCE_MAP.keys():
-        path = get_local_file_path(conf_name)
-        if os.path.exists(path):
-            try:
-                df = pd.read_csv(path, usecols=['id'])
+        safe_name = get_safe_name(conf_name)
+        if safe_name in counts:
+            cached[conf_name] = counts[safe_name]
+            continue
+        try:
+            df = _migrate_legacy_csv(store, conf_name)
+            if df is not None:
                 cached[conf_name] = len(df)
-            except:
-                pass
+        except Exception as e:
+            print(f"Error migrating cached CSV for {conf_name}: {e}")
     return cached
 
-def load_papers(conference_name: str) -> pd.DataFrame:
-    file_path = get_local_file_path(conference_name)
-    
-    if os.path.exists(file_path):
-        print(f"Loading {conference_name} from local cache...")
-        return pd.read_csv(file_path)
-    
-    print(f"Fetching {conference_name} from OpenReview (this may take a while)...")
-    return fetch_and_save_papers(conference_name)
-
-def fetch_and_save_papers(conference_name: str) -> pd.DataFrame:
+def load_papers(conference_name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    store = get_paper_store()
+    safe_name = get_safe_name(conference_name)
+
+    with span("data.load_papers", conference=conference_name) as current:
+        if store.has(safe_name):
+            print(f"Loading {conference_name} from local cache...")
+            current.set("source", "arrow")
+            df = store.read(safe_name, columns=columns)
+            current.set("rows", len(df))
+            return df
+
+        df = _migrate_legacy_csv(store, conference_name)
+        if df is not None:
+            current.set("source", "csv")
+            current.set("rows", len(df))
+            return df[columns] if columns else df
+
+        print(f"Fetching {conference_name} from OpenReview (this may take a while)...")
+        current.set("source", "openreview")
+        df = fetch_and_save_papers(conference_name)
+        current.set("rows", len(df))
+        return df[columns] if columns else df
+
+def fetch_and_save_papers(conference_name: str, client=None, mode: str = "full", progress_callback=None) -> pd.DataFrame:
     invitation_id = CONFERENCE_MAP.get(conference_name)
     if not invitation_id:
         raise ValueError(f"Unknown conference: {conference_name}")
 
     print(f"Connecting to OpenReview (API V2) to fetch papers for {conference_name} (ID: {invitation_id})...")
-    client = openreview.api.OpenReviewClient(baseurl='https://api2.openreview.net')
-    
-    notes = client.get_all_notes(invitation=invitation_id)
-    
-    papers_data = []
-    for note in notes:
-        title = note.content.get('title', {}).get('value', '')
-        abstract = note.content.get('abstract', {}).get('value', '')
-        authors = ", ".join(note.content.get('authors', {}).get('value', []))
-        author_emails = ", ".join(note.content.get('authorids', {}).get('value', []))
-        keywords = ", ".join(note.content.get('keywords', {}).get('value', []))
-        
-        paper = {
-            "id": note.id,
-            "title": title,
-            "abstract": abstract,
-            "authors": authors,
-            "author_emails": author_emails,
-            "keywords": keywords,
-            "pdf_url": f"https://openreview.net/pdf?id={note.id}"
-        }
-        papers_data.append(paper)
-        
-    if not papers_data:
-        raise ValueError(f"No papers found for {conference_name} with invitation {invitation_id}. Please check if the conference ID is correct or if the papers are public.")
-
-    df = pd.DataFrame(papers_data)
-    
-    os.makedirs(DATA_DIR, exist_ok=True)
-    
-    file_path = get_local_file_path(conference_name)
-    df.to_csv(file_path, index=False)
-    print(f"Saved {len(df)} papers to {file_path}")
-    
-    return df
+    store = get_paper_store()
+    safe_name = get_safe_name(conference_name)
+    sync = PaperSync(store, client or get_openreview_client())
+    with span("data.sync", conference=conference_name, mode=mode) as current:
+        stats = sync.sync(safe_name, invitation_id, mode=mode, progress_callback=progress_callback, conference=conference_name)
+        current.set("fetched", stats["fetched"])
+        current.set("rows", stats["rows"])
+    print(f"Saved papers to {store.path(safe_name)}")
+
+    return store.read(safe_name)
+
+def sync_papers(conference_name: str, client=None, progress_callback=None) -> pd.DataFrame:
+    # Fetches only the notes modified since the last sync and merges them into
+    # the cached conference (a full fetch if nothing is cached yet).
+    return fetch_and_save_papers(conference_name, client=client, mode="incremental", progress_callback=progress_callback)
+
+def split_authors(row) -> List[tuple]:
+    # Pairs each author name with its OpenReview id (a ~Profile id or an
+    # email); the two columns are written in the same order.
+    names = [n.strip() for n in str(row.get('authors') or '').split(",")]
+    ids = [a.strip() for a in str(row.get('author_emails') or '').split(",")]
+    return [(name, ids[i] if i < len(ids) else '') for i, name in enumerate(names) if name]
+
+def _profile_email(profile) -> Optional[str]:
+    public_email = profile.content.get('public_email')
+    if public_email:
+        return public_email
+    if profile.content.get('emails'):
+        return profile.content['emails'][0]
+    return None
+
+# Resolves OpenReview author ids to contact emails. ~Profile ids are fetched in
+# chunks through one shared client and remembered in a JSON file for ttl
+# seconds (profiles without an email too, so they are not asked for again).
+# index() builds author -> papers and paper -> authors maps from the authors /
+# author_emails columns, so contacts for a paper are dictionary lookups once
+# its authors have been resolved.
+class AuthorResolver:
+    def __init__(self, client=None, cache_path: str = AUTHOR_CACHE_PATH, ttl: float = AUTHOR_CACHE_TTL,
+                 chunk_size: int = PROFILE_CHUNK_SIZE):
+        self._client = client
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, Dict] = self._read_cache()
+        self.papers_by_author: Dict[str, List[str]] = {}
+        self.authors_by_paper: Dict[str, List[tuple]] = {}
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_openreview_client()
+        return self._client
+
+    def _read_cache(self) -> Dict[str, Dict]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read author cache {self.cache_path}: {e}")
+            return {}
+
+    def _write_cache(self):
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._profiles, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def _cached(self, profile_id: str, now: float) -> Optional[Dict]:
+        entry = self._profiles.get(profile_id)
+        if entry is None or now - entry.get("fetched_at", 0) > self.ttl:
+            return None
+        return entry
+
+    def resolve(self, author_ids: List[str]) -> Dict[str, Optional[str]]:
+        # The lock guards the cache only; profiles are fetched without it so
+        # one slow lookup does not block other callers reading the cache.
+        emails_map = {aid: aid for aid in author_ids if '@' in aid}
+        now = time.time()
+        with self._lock:
+            missing = []
+            for aid in dict.fromkeys(aid for aid in author_ids if aid.startswith('~')):
+                entry = self._cached(aid, now)
+                if entry is None:
+                    missing.append(aid)
+                else:
+                    emails_map[aid] = entry["email"]
+
+        fetched = {}
+        for start in range(0, len(missing), self.chunk_size):
+            chunk = missing[start:start + self.chunk_size]
+            try:
+                with span("openreview.get_profiles", profiles=len(chunk)):
+                    profiles = self.client.get_profiles(ids=chunk)
+            except Exception as e:
+                print(f"Error fetching profiles: {e}")
+                continue
+            found = {profile.id: _profile_email(profile) for profile in profiles}
+            for aid in chunk:
+                fetched[aid] = found.get(aid)
+
+        if fetched:
+            with self._lock:
+                for aid, email in fetched.items():
+                    self._profiles[aid] = {"email": email, "fetched_at": now}
+                self._write_cache()
+            emails_map.update(fetched)
+        return emails_map
+
+    def index(self, df: pd.DataFrame):
+        papers_by_author: Dict[str, List[str]] = {}
+        authors_by_paper: Dict[str, List[tuple]] = {}
+        for row in df[['id', 'authors', 'author_emails']].to_dict('records'):
+            pairs = split_authors(row)
+            authors_by_paper[row['id']] = pairs
+            for name, _ in pairs:
+                papers_by_author.setdefault(name, []).append(row['id'])
+        with self._lock:
+            self.papers_by_author.update(papers_by_author)
+            self.authors_by_paper.update(authors_by_paper)
+
+    def papers_by(self, author_name: str) -> List[str]:
+        return self.papers_by_author.get(author_name, [])
+
+    def prefetch(self, paper_ids: List[str]) -> Dict[str, Optional[str]]:
+        # One batched profile lookup for every author of the given papers.
+        ids = [aid for pid in paper_ids for _, aid in self.authors_by_paper.get(pid, []) if aid]
+        return self.resolve(ids)
+
+    def contacts(self, paper_id: str) -> Dict[str, str]:
+        # Author name -> email for one paper, from cached profiles only.
+        now = time.time()
+        contacts = {}
+        for name, aid in self.authors_by_paper.get(paper_id, []):
+            if '@' in aid:
+                contacts[name] = aid
+            elif aid.startswith('~'):
+                entry = self._cached(aid, now)
+                if entry and entry.get("email"):
+                    contacts[name] = entry["email"]
+        return contacts
+
+_resolver = None
+
+def get_author_resolver() -> AuthorResolver:
+    global _resolver
+    with _client_lock:
+        if _resolver is None:
+            _resolver = AuthorResolver()
+        return _resolver
 
 def get_author_details(author_ids: List[str]) -> Dict[str, str]:
     if not author_ids:
         return {}
-        
-    client = openreview.api.OpenReviewClient(baseurl='https://api2.openreview.net')
-    
-    profile_ids = [aid for aid in author_ids if aid.startswith('~')]
-    emails_map = {aid: aid for aid in author_ids if '@' in aid}
-    
-    if not profile_ids:
-        return emails_map
-        
-    try:
-        profiles = client.get_profiles(ids=profile_ids)
-        
-        for profile in profiles:
-            public_email = profile.content.get('public_email')
-            if public_email:
-                emails_map[profile.id] = public_email
-            elif profile.content.get('emails'):
-                emails_map[profile.id] = profile.content['emails'][0]
-            else:
-                emails_map[profile.id] = None
-                
-    except Exception as e:
-        print(f"Error fetching profiles: {e}")
-        
-    return emails_map
+    return get_author_resolver().resolve(author_ids)
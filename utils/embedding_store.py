@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+STORE_VERSION = 2
+SUPPORTED_DTYPES = ("float32", "float16")
+
+def hash_ids(ids: List[str]) -> str:
+    digest = hashlib.sha256()
+    for paper_id in ids:
+        digest.update(str(paper_id).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def hash_texts(texts: List[str]) -> List[str]:
+    return [hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest() for text in texts]
+
+# Raw .npy matrix opened with np.memmap plus a JSON manifest describing which
+# model produced it and which paper ids its rows belong to. Anything that does
+# not match the manifest is treated as missing so callers rebuild instead of
+# serving misaligned vectors. Each row is also keyed by (paper id, text hash)
+# in a sidecar .npz so a refreshed dataset only re-encodes what changed.
+# Rows are stored L2-normalized so a dot product is the cosine similarity.
+class EmbeddingStore:
+    def __init__(self, data_dir: str, name: str, model_name: str, dtype: str = "float32"):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        self.data_dir = data_dir
+        self.name = name
+        self.model_name = model_name
+        self.dtype = dtype
+        self.matrix_path = os.path.join(data_dir, f"{name}_embeddings.npy")
+        self.manifest_path = os.path.join(data_dir, f"{name}_embeddings.json")
+        self.keys_path = os.path.join(data_dir, f"{name}_embeddings_keys.npz")
+
+    def read_manifest(self) -> Optional[Dict]:
+        if not os.path.exists(self.manifest_path) or not os.path.exists(self.matrix_path):
+            return None
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _is_compatible(self, manifest: Optional[Dict]) -> bool:
+        return (
+            manifest is not None
+            and manifest.get("version") == STORE_VERSION
+            and manifest.get("model") == self.model_name
+            and manifest.get("dtype") == self.dtype
+        )
+
+    def mismatch_reason(self, ids: List[str], text_hashes: List[str]) -> Optional[str]:
+        manifest = self.read_manifest()
+        if manifest is None:
+            return "no embedding store"
+        if manifest.get("version") != STORE_VERSION:
+            return f"store version {manifest.get('version')} != {STORE_VERSION}"
+        if manifest.get("model") != self.model_name:
+            return f"model {manifest.get('model')} != {self.model_name}"
+        if manifest.get("dtype") != self.dtype:
+            return f"dtype {manifest.get('dtype')} != {self.dtype}"
+        if manifest.get("rows") != len(ids):
+            return f"{manifest.get('rows')} rows != {len(ids)} papers"
+        if manifest.get("ids_hash") != hash_ids(ids):
+            return "paper ids changed"
+        if manifest.get("texts_hash") != hash_ids(text_hashes):
+            return "paper titles or abstracts changed"
+        if not manifest.get("normalized"):
+            return "vectors are not normalized"
+        return None
+
+    def version(self) -> Optional[str]:
+        manifest = self.read_manifest()
+        if manifest is None:
+            return None
+        return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    def index_path(self, backend: str) -> str:
+        return os.path.join(self.data_dir, f"{self.name}_embeddings.{backend}")
+
+    def is_current(self, ids: List[str], text_hashes: List[str]) -> bool:
+        return self.mismatch_reason(ids, text_hashes) is None
+
+    def load(self, ids: List[str], text_hashes: List[str]) -> Optional[np.ndarray]:
+        reason = self.mismatch_reason(ids, text_hashes)
+        if reason is not None:
+            print(f"Embedding store for {self.name} needs rebuilding: {reason}")
+            return None
+        matrix = np.load(self.matrix_path, mmap_mode='r')
+        manifest = self.read_manifest()
+        if matrix.shape != (manifest["rows"], manifest["dim"]):
+            print(f"Embedding store for {self.name} needs rebuilding: shape {matrix.shape} does not match manifest")
+            return None
+        return matrix
+
+    def reuse_plan(self, ids: List[str], text_hashes: List[str]) -> Tuple[Optional[np.ndarray], np.ndarray, Dict[str, int]]:
+        # For every requested row, the row of the previous matrix holding the
+        # same (id, text hash), or -1 if it has to be encoded.
+        source_rows = np.full(len(ids), -1, dtype=np.int64)
+        stats = {"reused": 0, "new": len(ids), "edited": 0, "removed": 0}
+
+        manifest = self.read_manifest()
+        if not self._is_compatible(manifest) or not os.path.exists(self.keys_path):
+            return None, source_rows, stats
+        try:
+            with np.load(self.keys_path, allow_pickle=False) as keys:
+                old_ids = keys["ids"].tolist()
+                old_hashes = keys["text_hashes"].tolist()
+            previous = np.load(self.matrix_path, mmap_mode='r')
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not read previous embeddings for {self.name}: {e}")
+            return None, source_rows, stats
+        if previous.shape[0] != len(old_ids):
+            return None, source_rows, stats
+
+        old_rows = {paper_id: (row, text_hash) for row, (paper_id, text_hash) in enumerate(zip(old_ids, old_hashes))}
+        new_count = edited = 0
+        for i, (paper_id, text_hash) in enumerate(zip(ids, text_hashes)):
+            old = old_rows.get(paper_id)
+            if old is None:
+                new_count += 1
+            elif old[1] != text_hash:
+                edited += 1
+            else:
+                source_rows[i] = old[0]
+        kept_ids = set(ids)
+        stats = {
+            "reused": int((source_rows >= 0).sum()),
+            "new": new_count,
+            "edited": edited,
+            "removed": sum(1 for paper_id in old_ids if paper_id not in kept_ids),
+        }
+        return previous, source_rows, stats
+
+    def save(self, embeddings: np.ndarray, ids: List[str], text_hashes: List[str]) -> np.ndarray:
+        if embeddings.shape[0] != len(ids) or len(ids) != len(text_hashes):
+            raise ValueError(f"Got {embeddings.shape[0]} embeddings for {len(ids)} papers")
+        os.makedirs(self.data_dir, exist_ok=True)
+
+        tmp_path = self.matrix_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(normalize_rows(embeddings), dtype=self.dtype))
+        os.replace(tmp_path, self.matrix_path)
+
+        tmp_path = self.keys_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, ids=np.array(ids, dtype=str), text_hashes=np.array(text_hashes, dtype=str))
+        os.replace(tmp_path, self.keys_path)
+
+        manifest = {
+            "version": STORE_VERSION,
+            "model": self.model_name,
+            "dtype": self.dtype,
+            "dim": int(embeddings.shape[1]),
+            "rows": int(embeddings.shape[0]),
+            "ids_hash": hash_ids(ids),
+            "texts_hash": hash_ids(text_hashes),
+            "normalized": True,
+        }
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+        return np.load(self.matrix_path, mmap_mode='r')
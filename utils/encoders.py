@@ -0,0 +1,103 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+ENCODER_BACKENDS = ("torch", "onnx", "onnx-int8")
+INDEXING_MODES = ("serial", "parallel")
+# Quantized export shipped in the sentence-transformers hub repos; the AVX2
+# build runs on effectively every x86 CPU we deploy to.
+ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"
+
+def load_model(model_name: str, backend: str = "torch"):
+    # Imported here so that importing this module does not pull in torch.
+    from sentence_transformers import SentenceTransformer
+    if backend == "torch":
+        return SentenceTransformer(model_name, device='cpu')
+    if backend == "onnx":
+        return SentenceTransformer(model_name, device='cpu', backend='onnx')
+    if backend == "onnx-int8":
+        return SentenceTransformer(model_name, device='cpu', backend='onnx', model_kwargs={"file_name": ONNX_INT8_FILE})
+    raise ValueError(f"Unknown encoder backend: {backend}. Choose from {', '.join(ENCODER_BACKENDS)}")
+
+def model_identity(model_name: str, backend: str = "torch") -> str:
+    # Quantized vectors differ slightly from full-precision ones, so stores and
+    # caches built with one backend must not be served to another.
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+def length_sorted_batches(texts: List[str], rows: np.ndarray, max_batch: int = 64, max_tokens: int = 8192) -> Iterator[np.ndarray]:
+    # Group texts of similar length so padding is minimal, and cap each batch
+    # by an approximate padded token count instead of a fixed size.
+    lengths = np.array([min(len(texts[r]) // 4 + 2, 512) for r in rows], dtype=np.int64)
+    order = np.argsort(lengths, kind='stable')
+    batch = []
+    longest = 0
+    for pos in order:
+        length = lengths[pos]
+        if batch and (len(batch) >= max_batch or max(longest, length) * (len(batch) + 1) > max_tokens):
+            yield rows[batch]
+            batch = []
+            longest = 0
+        batch.append(pos)
+        longest = max(longest, length)
+    if batch:
+        yield rows[batch]
+
+_worker_model = None
+
+def _init_worker(model_name: str, backend: str):
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+    _worker_model = load_model(model_name, backend)
+
+def _encode_batch(rows: np.ndarray, texts: List[str]):
+    return rows, _worker_model.encode(texts, batch_size=len(texts))
+
+def _report(progress_callback, done: int, total: int):
+    if progress_callback:
+        progress_callback(min(done / total, 1.0), f"Indexing paper {done}/{total}...")
+
+def encode_rows(model, texts: List[str], rows: np.ndarray, out: Optional[np.ndarray], progress_callback=None,
+                mode: str = "serial", model_name: Optional[str] = None, backend: str = "torch",
+                workers: Optional[int] = None) -> Optional[np.ndarray]:
+    # Encodes texts[r] for every r in rows into out[r], allocating out on the
+    # first batch when it is None. Returns out.
+    if mode not in INDEXING_MODES:
+        raise ValueError(f"Unknown indexing mode: {mode}. Choose from {', '.join(INDEXING_MODES)}")
+    total = len(rows)
+    if total == 0:
+        return out
+
+    def store(batch_rows, batch_emb):
+        nonlocal out
+        if out is None:
+            out = np.empty((len(texts), batch_emb.shape[1]), dtype=np.float32)
+        out[batch_rows] = batch_emb
+
+    done = 0
+    if mode == "serial":
+        for batch_rows in length_sorted_batches(texts, rows):
+            store(batch_rows, model.encode([texts[r] for r in batch_rows], batch_size=len(batch_rows)))
+            done += len(batch_rows)
+            _report(progress_callback, done, total)
+        return out
+
+    workers = workers or os.cpu_count() or 1
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(model_name, backend)) as pool:
+        futures = [
+            pool.submit(_encode_batch, batch_rows, [texts[r] for r in batch_rows])
+            for batch_rows in length_sorted_batches(texts, rows, max_batch=32)
+        ]
+        for future in as_completed(futures):
+            batch_rows, batch_emb = future.result()
+            store(batch_rows, batch_emb)
+            done += len(batch_rows)
+            _report(progress_callback, done, total)
+    return out
@@ -0,0 +1,214 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import pandas as pd
+
+from utils.pdf_extractor import get_emails_from_pdf
+from utils.tracing import current_span, propagate, span, traced
+
+MAX_WORKERS = 16
+PER_HOST_LIMIT = 4
+# Each lookup passes TASK_TIMEOUT to its own network call; DEADLINE bounds the
+# whole batch so one hung host cannot hold the spinner.
+TASK_TIMEOUT = 10.0
+DEADLINE = 45.0
+SEARCH_HOST = "www.google.com"
+
+def match_author_email(author_name: str, emails: List[str]) -> Optional[str]:
+    name_parts = author_name.lower().split()
+    if not name_parts:
+        return None
+    last_name = "".join(c for c in name_parts[-1] if c.isalnum())
+    for email in emails:
+        if last_name in email.lower():
+            return email
+    return None
+
+def parse_x_handle(results: List[str]) -> Optional[Dict[str, str]]:
+    for result in results:
+        normalized = result.split('?')[0].rstrip('/')
+        if "twitter.com" in normalized or "x.com" in normalized:
+            handle = normalized.split('/')[-1]
+            if handle and handle.lower() not in ("home", "i", "login"):
+                return {"twitter": handle, "twitter_url": normalized}
+    return None
+
+def google_x_search(author_name: str, timeout: float = TASK_TIMEOUT) -> List[str]:
+    from googlesearch import search
+    return list(search(f"{author_name} x.com", num_results=5, timeout=timeout))
+
+class HostLimiter:
+    def __init__(self, per_host: int = PER_HOST_LIMIT):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+    @contextmanager
+    def slot(self, host: str):
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        with semaphore:
+            yield
+
+def candidate_row(paper: Dict, candidates: pd.DataFrame) -> Optional[pd.Series]:
+    paper_id = paper.get('id')
+    if paper_id is None:
+        return None
+    try:
+        pid_int = int(paper_id)
+    except (TypeError, ValueError):
+        return None
+    if pid_int not in candidates.index:
+        return None
+    return candidates.loc[pid_int]
+
+def paper_url(paper: Dict, candidates: pd.DataFrame) -> Optional[str]:
+    row = candidate_row(paper, candidates)
+    return None if row is None else row.get('pdf_url', '#')
+
+def normalize_name(name: str) -> str:
+    return " ".join(str(name).lower().split())
+
+def apply_emails(paper: Dict, emails: List[str]):
+    for auth_obj in paper.get('authors', []):
+        if auth_obj.get('email'):
+            continue
+        email = match_author_email(auth_obj.get('name', ''), emails)
+        if email:
+            auth_obj['email'] = email
+
+def apply_profile_contacts(paper: Dict, contacts: Dict[str, str]) -> bool:
+    # Fills emails from OpenReview profiles by full author name, ignoring case
+    # and spacing; authors sharing only a surname are not matched. Returns
+    # True when every author has an email.
+    by_name = {normalize_name(name): email for name, email in contacts.items()}
+    complete = True
+    for auth_obj in paper.get('authors', []):
+        email = by_name.get(normalize_name(auth_obj.get('name', '')))
+        if email:
+            auth_obj['email'] = email
+        elif not auth_obj.get('email'):
+            complete = False
+    return complete
+
+def prefetch_profiles(resolver, papers: pd.DataFrame, executor: ThreadPoolExecutor) -> Future:
+    # Indexes the papers' authors and starts one batched profile lookup for all
+    # of them on executor.
+    resolver.index(papers)
+    return executor.submit(propagate(resolver.prefetch), papers['id'].tolist())
+
+# Fetches every recommended paper's PDF and every author's X handle at the same
+# time on a bounded thread pool, with at most per_host_limit requests in flight
+# per host. Results are applied on the calling thread as each task finishes and
+# reported through progress_callback(fraction, text); anything still running
+# after deadline seconds is abandoned and the paper keeps what it has so far.
+# Emails come from OpenReview profiles first when a resolver is given (one
+# batched lookup for all papers, counted against the same deadline); papers
+# whose OpenReview id is in contacts (see utils.contact_job) take the rest
+# from there. Either way a paper whose authors all have emails skips the PDF
+# download.
+#
+# Callers enriching in several calls (such as one per streamed recommendation)
+# pass one limiter and executor for all of them, so the per-host cap and the
+# worker count hold across calls rather than per call, and start the profile
+# lookup once for the whole candidate set with prefetch_profiles, passing its
+# future as profiles so each call waits on it instead of looking up again.
+@traced("enrich")
+def enrich_recommendations(recommendations: List[Dict], candidates: pd.DataFrame, progress_callback=None,
+                           max_workers: int = MAX_WORKERS, per_host_limit: int = PER_HOST_LIMIT,
+                           deadline: float = DEADLINE,
+                           fetch_emails: Callable[[str], List[str]] = get_emails_from_pdf,
+                           search_handles: Callable[[str], List[str]] = google_x_search,
+                           search_host: str = SEARCH_HOST,
+                           contacts: Optional[Dict[str, List[str]]] = None, resolver=None,
+                           limiter: Optional[HostLimiter] = None,
+                           executor: Optional[ThreadPoolExecutor] = None,
+                           profiles: Optional[Future] = None) -> List[Dict]:
+    limiter = limiter or HostLimiter(per_host_limit)
+
+    def limited(kind, host, fn, *args):
+        with span(f"enrich.{kind}", host=host) as current:
+            queued = time.monotonic()
+            with limiter.slot(host):
+                current.set("slot_wait_ms", (time.monotonic() - queued) * 1000)
+                return fn(*args)
+
+    run = propagate(limited)
+
+    pool = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="catalogger-enrich")
+    tasks = {}
+    contacts = contacts or {}
+    rows = [(paper, candidate_row(paper, candidates)) for paper in recommendations]
+    rows = [(paper, row) for paper, row in rows if row is not None]
+    stop_at = time.monotonic() + deadline
+    if resolver is not None and rows:
+        # The profile lookup runs on the pool under the same deadline; if it
+        # runs out, papers use whatever profiles are already cached.
+        try:
+            with span("enrich.profiles", papers=len(rows), shared=profiles is not None):
+                if profiles is None:
+                    profiles = prefetch_profiles(resolver, pd.DataFrame([row for _, row in rows]), pool)
+                profiles.result(timeout=max(0.0, stop_at - time.monotonic()))
+        except FutureTimeoutError:
+            print(f"Author profile lookup still running after {deadline:.0f}s; using cached profiles")
+        except Exception as e:
+            print(f"Author profile lookup failed: {e}")
+            resolver = None
+
+    for paper, row in rows:
+        url = row.get('pdf_url', '#')
+        paper['url'] = url
+        complete = resolver is not None and apply_profile_contacts(paper, resolver.contacts(row.get('id')))
+        known = contacts.get(row.get('id'))
+        if not complete and known is not None:
+            apply_emails(paper, known)
+        elif not complete and url and url != '#':
+            future = pool.submit(run, "emails", urlparse(url).netloc, fetch_emails, url)
+            tasks[future] = ("emails", paper, None)
+        for author in paper.get('authors', []):
+            if author.get('name'):
+                future = pool.submit(run, "handle", search_host, search_handles, author['name'])
+                tasks[future] = ("handle", paper, author)
+
+    total = len(tasks)
+    done = 0
+    current_span().set("lookups", total)
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = stop_at - time.monotonic()
+            if remaining <= 0:
+                break
+            finished, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in finished:
+                kind, paper, author = tasks[future]
+                done += 1
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Enrichment {kind} lookup failed for {paper.get('title', paper.get('id'))}: {e}")
+                    result = None
+                if kind == "emails" and result:
+                    apply_emails(paper, result)
+                elif kind == "handle" and result:
+                    handle = parse_x_handle(result)
+                    if handle:
+                        author.update(handle)
+                if progress_callback:
+                    progress_callback(done / total, f"Fetched {done}/{total} contact lookups...")
+        if pending:
+            print(f"Enrichment stopped after {deadline:.0f}s with {len(pending)} lookups still running")
+            current_span().set("abandoned", len(pending))
+    finally:
+        if executor is None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        else:
+            for future in pending:
+                future.cancel()
+
+    return recommendations
@@ -0,0 +1,135 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.embedding_store import hash_ids
+
+# Facet name -> the comma-joined column it is built from.
+FACET_FIELDS = {"keywords": "keywords", "authors": "authors"}
+
+def normalize_value(value: str) -> str:
+    return " ".join(str(value).lower().split())
+
+def split_values(text) -> List[str]:
+    if not isinstance(text, str):
+        return []
+    return [value.strip() for value in text.split(",") if value.strip()]
+
+# Inverted index from one facet's values (keywords or author names) to the
+# rows that carry them, stored like the BM25 postings: a sorted array of
+# normalized values, offsets into one int32 array of row ids, and each row
+# list sorted so subsets combine with numpy set operations.
+class FacetIndex:
+    def __init__(self, values: np.ndarray, labels: np.ndarray, offsets: np.ndarray, rows: np.ndarray):
+        self.values = values
+        self.labels = labels
+        self.offsets = offsets
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.values)
+
+    @classmethod
+    def build(cls, column: pd.Series) -> "FacetIndex":
+        postings: Dict[str, List[int]] = {}
+        labels: Dict[str, str] = {}
+        for row, text in enumerate(column.tolist()):
+            for value in split_values(text):
+                key = normalize_value(value)
+                rows = postings.setdefault(key, [])
+                # A value listed twice on one paper is one posting.
+                if not rows or rows[-1] != row:
+                    rows.append(row)
+                labels.setdefault(key, value)
+
+        values = sorted(postings)
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        for i, value in enumerate(values):
+            offsets[i + 1] = offsets[i] + len(postings[value])
+        rows = np.empty(offsets[-1], dtype=np.int32)
+        for i, value in enumerate(values):
+            rows[offsets[i]:offsets[i + 1]] = postings[value]
+        return cls(np.array(values, dtype=str), np.array([labels[v] for v in values], dtype=str), offsets, rows)
+
+    def _position(self, value: str) -> Optional[int]:
+        key = normalize_value(value)
+        pos = int(np.searchsorted(self.values, key))
+        if pos >= len(self.values) or self.values[pos] != key:
+            return None
+        return pos
+
+    def rows_for(self, value: str) -> np.ndarray:
+        pos = self._position(value)
+        if pos is None:
+            return self.rows[:0]
+        return self.rows[self.offsets[pos]:self.offsets[pos + 1]]
+
+    def match(self, values: List[str]) -> np.ndarray:
+        # Rows carrying any of the values.
+        matched = [self.rows_for(value) for value in values]
+        if len(matched) == 1:
+            return matched[0]
+        return np.unique(np.concatenate(matched)) if matched else self.rows[:0]
+
+    def has(self, value: str) -> bool:
+        return self._position(value) is not None
+
+    def options(self, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        # (value as first written, paper count), most common first.
+        counts = np.diff(self.offsets)
+        order = np.lexsort((self.values, -counts))
+        if limit is not None:
+            order = order[:limit]
+        return [(str(self.labels[i]), int(counts[i])) for i in order]
+
+# Every facet of one conference, built when its SearchEngine loads. Filters are
+# {facet: [values]}; a paper passes when it has any of the values of each
+# filtered facet.
+class Facets:
+    def __init__(self, indexes: Dict[str, FacetIndex], n_rows: int, version: str):
+        self.indexes = indexes
+        self.n_rows = n_rows
+        self.version = version
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "Facets":
+        indexes = {}
+        texts = []
+        for facet, column in FACET_FIELDS.items():
+            series = df[column] if column in df else pd.Series([''] * len(df), index=df.index)
+            indexes[facet] = FacetIndex.build(series)
+            texts.extend(series.fillna('').astype(str).tolist())
+        return cls(indexes, len(df), hash_ids(texts)[:16])
+
+    def __getitem__(self, facet: str) -> FacetIndex:
+        return self.indexes[facet]
+
+    def select(self, filters: Optional[Dict[str, List[str]]]) -> Optional[np.ndarray]:
+        # Sorted row ids passing every filter, or None when nothing is filtered.
+        filters = normalize_filters(filters)
+        if not filters:
+            return None
+        selected = None
+        for facet, values in filters:
+            if facet not in self.indexes:
+                raise ValueError(f"Unknown facet: {facet}. Choose from {', '.join(self.indexes)}")
+            rows = self.indexes[facet].match(list(values))
+            selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+            if len(selected) == 0:
+                break
+        return selected.astype(np.int64)
+
+def normalize_filters(filters: Optional[Dict[str, List[str]]]) -> Tuple:
+    # Hashable, order-independent form of a filter dict, used in cache keys;
+    # facets without values are dropped.
+    if not filters:
+        return ()
+    normalized = []
+    for facet, values in filters.items():
+        if isinstance(values, str):
+            values = [values]
+        values = tuple(sorted({normalize_value(value) for value in values if str(value).strip()}))
+        if values:
+            normalized.append((facet, values))
+    return tuple(sorted(normalized))
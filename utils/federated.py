@@ -0,0 +1,98 @@
+import heapq
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from utils.data_fetcher import get_cached_conferences
+from utils.registry import EngineLease, EngineRegistry, get_registry
+from utils.tracing import propagate
+
+def _release_all(leases: Dict[str, EngineLease]):
+    for lease in leases.values():
+        lease.release()
+    leases.clear()
+
+# Searches every cached conference at once. Each conference is a shard with its
+# own index in the shared registry; shards are loaded and queried in parallel
+# and their per-shard top-k lists are merged into one global top-k by cosine
+# similarity, the one score every shard computes against the same model.
+class FederatedSearch:
+    def __init__(self, registry: Optional[EngineRegistry] = None, max_workers: int = 8):
+        self.registry = registry or get_registry()
+        self.max_workers = max_workers
+        self.leases: Dict[str, EngineLease] = {}
+        # Leases go back to the registry when this object is dropped (say with
+        # the session holding it) even if release() is never called.
+        self._finalizer = weakref.finalize(self, _release_all, self.leases)
+
+    def load(self, conferences: Optional[List[str]] = None, progress_callback=None) -> List[str]:
+        conferences = list(conferences) if conferences is not None else sorted(get_cached_conferences())
+        # Conferences no longer searched are handed back so the registry can
+        # evict them once idle.
+        for conf in [conf for conf in self.leases if conf not in conferences]:
+            self.leases.pop(conf).release()
+        missing = [conf for conf in conferences if conf not in self.leases]
+        if missing:
+            done = 0
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as pool:
+                futures = {conf: pool.submit(propagate(self.registry.acquire), conf) for conf in missing}
+                for conf, future in futures.items():
+                    try:
+                        self.leases[conf] = future.result()
+                    except Exception as e:
+                        print(f"Skipping {conf} in federated search: {e}")
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done / len(missing), f"Loaded {done}/{len(missing)} conferences...")
+        return [conf for conf in conferences if conf in self.leases]
+
+    def release(self):
+        _release_all(self.leases)
+
+    def search(self, query: str, top_k: int = 50, conferences: Optional[List[str]] = None,
+               filters: Optional[Dict[str, List[str]]] = None) -> pd.DataFrame:
+        return self.search_many([query], top_k=top_k, conferences=conferences, filters=filters)[0]
+
+    def search_many(self, queries: List[str], top_k: int = 50, conferences: Optional[List[str]] = None,
+                    filters: Optional[Dict[str, List[str]]] = None) -> List[pd.DataFrame]:
+        # conferences limits the search to those shards; filters are applied by
+        # each shard's facet indexes before it scores anything.
+        shards = self.load(conferences)
+        if not shards or not queries:
+            return [pd.DataFrame() for _ in queries]
+
+        # Every shard shares the registry's model, so encode once for all of them.
+        query_embeddings = self.leases[shards[0]].engine.encode_queries(queries)
+
+        def search_shard(conf):
+            return conf, self.leases[conf].engine.search_many(queries, top_k=top_k, query_embeddings=query_embeddings, filters=filters)
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(shards))) as pool:
+            shard_results = list(pool.map(propagate(search_shard), shards))
+
+        merged = []
+        for q in range(len(queries)):
+            # Each shard picked its top_k with its own (hybrid) ordering, but
+            # shard ranks and BM25 scores are not comparable across shards;
+            # cosine similarity is, so the global top_k is taken on it.
+            candidates = []
+            for conf, results in shard_results:
+                for position, score in enumerate(results[q]['similarity_score'].tolist()):
+                    candidates.append((score, conf, position))
+            best = heapq.nlargest(top_k, candidates, key=lambda c: c[0])
+
+            frames = []
+            for conf, results in shard_results:
+                positions = [position for _, c, position in best if c == conf]
+                if positions:
+                    frame = results[q].iloc[positions].copy()
+                    frame['conference'] = conf
+                    frames.append(frame)
+            if frames:
+                combined = pd.concat(frames).sort_values('similarity_score', ascending=False, kind='stable')
+                merged.append(combined.reset_index(drop=True))
+            else:
+                merged.append(pd.DataFrame())
+        return merged
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+# One small JSON file per string key, named by the key's SHA-256. The key is
+# also stored in the entry (under key_field) so a hash collision reads as a
+# miss. Total size is capped; the least recently used entries are evicted
+# first.
+class JsonFileCache:
+    def __init__(self, cache_dir: str, max_bytes: int = 64 * 1024 * 1024, key_field: str = "key"):
+        self.cache_dir = cache_dir
+        self.key_field = key_field
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get(self.key_field) != key:
+            return None
+        try:
+            # mtime doubles as last-access time for LRU eviction.
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, entry: Dict):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = dict(entry, **{self.key_field: key})
+        path = self._path(key)
+        data = json.dumps(entry).encode("utf-8")
+        with self._lock:
+            # Sized before the write, so a first scan does not count it twice.
+            size = self._current_size()
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._size = size + len(data) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json"))
+        return self._size
+
+    def _evict(self):
+        entries = sorted(
+            (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+            for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json")
+        )
+        size = sum(entry[1] for entry in entries)
+        # Drop to 90% of the cap so eviction does not run on every write.
+        target = int(self.max_bytes * 0.9)
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+                size -= entry_size
+            except OSError:
+                pass
+        self._size = size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            if not os.path.isdir(self.cache_dir):
+                return {"entries": 0, "bytes": 0, "max_bytes": self.max_bytes}
+            entries = [e for e in os.scandir(self.cache_dir) if e.name.endswith(".json")]
+            return {"entries": len(entries), "bytes": sum(e.stat().st_size for e in entries), "max_bytes": self.max_bytes}
+
+def fresh(entry: Dict, max_age: float) -> bool:
+    return time.time() - entry.get("checked_at", 0) < max_age
@@ -0,0 +1,72 @@
+import json
+from typing import Dict, List
+
+# Incremental parser for a streamed JSON array of objects, e.g. an LLM reply
+# arriving a few tokens at a time. feed() returns every object completed by the
+# new text. Anything before the opening '[' (such as a ```json fence) and after
+# the closing ']' is ignored; "[]" is an empty but finished array, while a '['
+# whose first element is not an object (such as "[are]" in a preamble) is taken
+# as prose and the search goes on.
+class JsonArrayParser:
+    def __init__(self):
+        self.started = False
+        self.finished = False
+        # Between the '[' and its first non-whitespace character.
+        self._opening = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._buffer: List[str] = []
+        self.count = 0
+
+    def feed(self, text: str) -> List[Dict]:
+        objects = []
+        for char in text:
+            if self.finished:
+                break
+            if self._opening:
+                if char.isspace():
+                    continue
+                self._opening = False
+                if char == ']':
+                    # "[]": a complete, empty answer.
+                    self.finished = True
+                    continue
+                if char != '{':
+                    self.started = False
+            if not self.started:
+                if char == '[':
+                    self.started = True
+                    self._opening = True
+                continue
+
+            if self._depth > 0:
+                self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if self._depth == 0:
+                    self._buffer = [char]
+                self._depth += 1
+            elif char in '}]':
+                if self._depth == 0:
+                    # The closing bracket of the array itself.
+                    self.finished = True
+                    continue
+                self._depth -= 1
+                if self._depth == 0:
+                    value = json.loads("".join(self._buffer))
+                    self._buffer = []
+                    if isinstance(value, dict):
+                        objects.append(value)
+                        self.count += 1
+        return objects
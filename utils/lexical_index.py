@@ -0,0 +1,145 @@
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.embedding_store import hash_ids, hash_texts
+
+INDEX_VERSION = 1
+# Title and keyword matches say more about a paper than a passing mention in
+# the abstract.
+FIELD_WEIGHTS = {"title": 2.0, "keywords": 2.0, "abstract": 1.0}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-/][a-z0-9]+)*")
+
+def tokenize(text: str) -> List[str]:
+    # Compounds like "sim-to-real" are kept whole (so they can be matched
+    # exactly) and also split into their parts.
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        if "-" in token or "/" in token:
+            tokens.extend(part for part in re.split(r"[-/]", token) if part)
+    return tokens
+
+def corpus_version(df: pd.DataFrame) -> str:
+    fields = [df[col].fillna('') if col in df else pd.Series([''] * len(df), index=df.index) for col in FIELD_WEIGHTS]
+    texts = (fields[0] + "\x1f" + fields[1] + "\x1f" + fields[2]).tolist()
+    return hash_ids(df['id'].astype(str).tolist() + hash_texts(texts))
+
+# BM25 over title, abstract and keywords stored as CSR postings: a sorted
+# vocabulary, per-term offsets into parallel doc-id / term-frequency arrays, and
+# per-document lengths. Term lookup is a binary search over the vocabulary.
+class BM25Index:
+    def __init__(self, vocab: np.ndarray, offsets: np.ndarray, doc_ids: np.ndarray, tfs: np.ndarray,
+                 doc_lens: np.ndarray, version: str, k1: float = 1.2, b: float = 0.75):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_lens = doc_lens
+        self.version = version
+        self.k1 = k1
+        self.b = b
+        self.n_docs = len(doc_lens)
+        self.avg_len = float(doc_lens.mean()) if self.n_docs else 0.0
+        # Length normalisation only depends on the document, so do it once.
+        self._norm = (k1 * (1 - b + b * doc_lens / self.avg_len)).astype(np.float32) if self.n_docs else doc_lens
+
+    def __len__(self):
+        return self.n_docs
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, version: str) -> "BM25Index":
+        postings: Dict[str, List[Tuple[int, float]]] = {}
+        doc_lens = np.zeros(len(df), dtype=np.float32)
+        columns = {field: (df[field].fillna('').tolist() if field in df else [''] * len(df)) for field in FIELD_WEIGHTS}
+
+        for doc in range(len(df)):
+            counts = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(columns[field][doc]):
+                    counts[token] += weight
+            doc_lens[doc] = sum(counts.values())
+            for token, tf in counts.items():
+                postings.setdefault(token, []).append((doc, tf))
+
+        vocab = sorted(postings)
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        for i, term in enumerate(vocab):
+            offsets[i + 1] = offsets[i] + len(postings[term])
+        doc_ids = np.empty(offsets[-1], dtype=np.int32)
+        tfs = np.empty(offsets[-1], dtype=np.float32)
+        for i, term in enumerate(vocab):
+            entries = postings[term]
+            doc_ids[offsets[i]:offsets[i + 1]] = [doc for doc, _ in entries]
+            tfs[offsets[i]:offsets[i + 1]] = [tf for _, tf in entries]
+
+        return cls(np.array(vocab, dtype=str), offsets, doc_ids, tfs, doc_lens, version)
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f, vocab=self.vocab, offsets=self.offsets, doc_ids=self.doc_ids, tfs=self.tfs,
+                doc_lens=self.doc_lens, version=np.array(f"{INDEX_VERSION}:{self.version}"),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, version: str) -> Optional["BM25Index"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data["version"]) != f"{INDEX_VERSION}:{version}":
+                    return None
+                return cls(data["vocab"], data["offsets"], data["doc_ids"], data["tfs"], data["doc_lens"], version)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not read lexical index {path}: {e}")
+            return None
+
+    @classmethod
+    def load_or_build(cls, df: pd.DataFrame, path: str) -> "BM25Index":
+        version = corpus_version(df)
+        index = cls.load(path, version)
+        if index is None:
+            print(f"Building BM25 index for {len(df)} papers...")
+            index = cls.build(df, version)
+            index.save(path)
+        return index
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        pos = int(np.searchsorted(self.vocab, term))
+        if pos >= len(self.vocab) or self.vocab[pos] != term:
+            return self.doc_ids[:0], self.tfs[:0]
+        start, end = self.offsets[pos], self.offsets[pos + 1]
+        return self.doc_ids[start:end], self.tfs[start:end]
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            docs, tfs = self.postings(term)
+            if len(docs) == 0:
+                continue
+            idf = math.log(1 + (self.n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + self._norm[docs])
+        return scores
+
+    def search(self, query: str, top_k: int, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # rows (sorted row ids) restricts the results to those documents.
+        scores = self.scores(query)
+        if rows is not None:
+            matched = rows[scores[rows] > 0]
+        else:
+            matched = np.flatnonzero(scores > 0)
+        if top_k <= 0:
+            matched = matched[:0]
+        elif len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        order = np.argsort(-scores[matched], kind='stable')
+        return scores[matched][order], matched[order].astype(np.int64)
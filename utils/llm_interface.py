@@ -1,32 +1,296 @@
-import google.generativeai as genai
-from openai import OpenAI
+import hashlib
 import json
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.cache import LRUCache
+from utils.json_stream import JsonArrayParser
+from utils.json_cache import JsonFileCache, fresh
+from utils.tracing import propagate, record, span
+
+# One JSON file per reply, keyed by cache_key(), LRU-capped.
+CACHE_DIR = os.path.join("data", "llm_cache")
+CACHE_MAX_AGE = 7 * 24 * 3600
+# Approximate prompt size (in tokens) the candidate list is packed into.
+PROMPT_TOKEN_BUDGET = int(os.environ.get("CATALOGGER_PROMPT_BUDGET", "8000"))
+# Below this an abstract says too little to be worth including.
+MIN_ABSTRACT_TOKENS = 40
+# Bump when the prompt changes so old cached answers are not served.
+PROMPT_VERSION = 1
+OPENROUTER_BASE_URL = os.environ.get("CATALOGGER_LLM_BASE_URL", "https://openrouter.ai/api/v1")
+# "sharded" scores the candidates in concurrent small requests, then writes the
+# recommendations for a shortlist of the best-scored papers only.
+LLM_MODES = ("single", "sharded")
+LLM_MODE = os.environ.get("CATALOGGER_LLM_MODE", "single")
+SHARD_SIZE = 10
+SHARD_TOKEN_BUDGET = 2500
+SHORTLIST_SIZE = 8
+LLM_WORKERS = 4
+# Rate-limited (429) and transient failures are retried with exponential
+# backoff, or after the server's Retry-After when it sends one.
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+RETRYABLE_ERRORS = ("APIConnectionError", "APITimeoutError", "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded")
+
+_cache = JsonFileCache(CACHE_DIR, max_bytes=16 * 1024 * 1024)
+
+def get_response_cache() -> JsonFileCache:
+    return _cache
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English prose.
+    return len(text) // 4 + 1
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    # Prefer ending on a full sentence, as long as that keeps most of the room.
+    sentence_end = cut.rfind(". ")
+    if sentence_end > max_chars // 2:
+        return cut[:sentence_end + 1] + " …"
+    return cut.rsplit(" ", 1)[0] + " …"
+
+def normalize_interests(user_interests: str) -> str:
+    parts = {" ".join(part.lower().split()) for part in user_interests.split(",")}
+    return ", ".join(sorted(part for part in parts if part))
+
+def rank_papers(papers_df):
+    # Best first: by cross-encoder score when the candidates were reranked,
+    # otherwise by search similarity.
+    for column in ('rerank_score', 'similarity_score'):
+        if column in papers_df.columns:
+            return papers_df.sort_values(column, ascending=False, kind='stable')
+    return papers_df
+
+def paper_hashes(papers_df) -> List[str]:
+    fields = papers_df.reindex(columns=['title', 'authors', 'abstract']).fillna('').astype(str)
+    return [hashlib.sha256("\0".join(row).encode("utf-8")).hexdigest()[:16] for row in fields.itertuples(index=False)]
+
+def pack_papers(papers_df, budget: int) -> Tuple[str, int]:
+    # Lists papers from best to worst match. Titles and authors are always
+    # kept; the rest of the budget is shared evenly between abstracts, with
+    # whatever a short abstract leaves unused passed on to the next one. If
+    # even MIN_ABSTRACT_TOKENS each does not fit, the lowest-ranked papers are
+    # dropped, but the best one is always kept with at least that much of its
+    # abstract so the request never goes out without papers.
+    papers_df = rank_papers(papers_df)
+    headers = [f"ID: {idx}\nTitle: {row['title']}\nAuthors: {row['authors']}\nAbstract: " for idx, row in papers_df.iterrows()]
+    abstracts = papers_df['abstract'].fillna('').astype(str).tolist()
+    costs = [estimate_tokens(header) + MIN_ABSTRACT_TOKENS for header in headers]
+    count = len(headers)
+    while count > 1 and sum(costs[:count]) > budget:
+        count -= 1
+
+    pool = budget - sum(estimate_tokens(header) for header in headers[:count])
+    entries = []
+    for position in range(count):
+        abstract = truncate_to_tokens(abstracts[position], max(pool // (count - position), MIN_ABSTRACT_TOKENS))
+        pool -= estimate_tokens(abstract)
+        entries.append(f"{headers[position]}{abstract}\n\n")
+    return "".join(entries), count
+
+def retry_delay(e: Exception, attempt: int) -> Optional[float]:
+    # Seconds to wait before retrying after e, or None if retrying will not help.
+    status = getattr(e, "status_code", None) or getattr(e, "code", None)
+    if status not in RETRYABLE_STATUS and type(e).__name__ not in RETRYABLE_ERRORS:
+        return None
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    try:
+        return min(float(headers.get("retry-after")), BACKOFF_MAX)
+    except (TypeError, ValueError):
+        return min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX) * random.uniform(0.5, 1.0)
+
+def with_retries(fn: Callable, max_retries: int = MAX_RETRIES):
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            delay = retry_delay(e, attempt)
+            if delay is None or attempt == max_retries:
+                raise
+            print(f"LLM request failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def key_hash(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+# google.generativeai keeps one API key for the whole process. Gemini calls
+# switch it to their own key and send the request under this lock, so
+# concurrent users never send each other's key.
+_gemini_lock = threading.Lock()
+_gemini_key: Optional[str] = None
+
+# Bounded so a long-running process does not keep every user's client (and
+# key) alive; pooled entries are keyed by a hash of the key, not the key.
+_instances = LRUCache(maxsize=16, ttl=3600)
+_instances_lock = threading.Lock()
+
+def get_llm(provider: str, api_key: str, base_url: Optional[str] = None) -> "LLMInterface":
+    # One interface (and so one SDK client with its connection pool) per
+    # provider, key and endpoint, reused across requests.
+    key = (provider, key_hash(api_key), base_url)
+    with _instances_lock:
+        llm = _instances.get(key)
+        if llm is None:
+            llm = LLMInterface(provider, api_key, base_url=base_url)
+            _instances.put(key, llm)
+        return llm
 
 class LLMInterface:
-    def __init__(self, provider: str, api_key: str):
+    def __init__(self, provider: str, api_key: str, base_url: Optional[str] = None):
         self.provider = provider
         self.api_key = api_key
         
         if provider == "Google Gemini":
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-2.5-pro')
+            import google.generativeai as genai
+            self.genai = genai
+            self.model_name = 'gemini-2.5-pro'
+            self.model = genai.GenerativeModel(self.model_name)
         elif provider == "OpenRouter":
+            from openai import OpenAI
             self.client = OpenAI(
-                base_url="https://openrouter.ai/api/v1",
+                base_url=base_url or OPENROUTER_BASE_URL,
                 api_key=api_key,
+                # Retries are handled by with_retries so they honour Retry-After.
+                max_retries=0,
             )
             self.model_name = "openai/gpt-4o-mini"
 
-    def analyze_papers(self, papers_df, user_interests):
-        papers_context = ""
-        for idx, row in papers_df.iterrows():
-            papers_context += f"ID: {idx}\nTitle: {row['title']}\nAbstract: {row['abstract']}\nAuthors: {row['authors']}\n\n"
+    def _gemini(self, call: Callable):
+        # Runs call with genai configured for this interface's key. A
+        # streamed call returns once its first chunk has arrived, after which
+        # the request no longer reads the global configuration.
+        global _gemini_key
+        with _gemini_lock:
+            if _gemini_key != key_hash(self.api_key):
+                self.genai.configure(api_key=self.api_key)
+                _gemini_key = key_hash(self.api_key)
+            return call()
+
+    def cache_key(self, papers_df, user_interests, token_budget: int, kind: str = "recommend") -> str:
+        # The prompt refers to papers by their row label, so the key covers the
+        # (label, paper id) pairs rather than the ids alone, plus a hash of what
+        # the prompt shows of each paper so an edited title or abstract misses.
+        candidates = sorted(zip(map(str, papers_df.index), papers_df['id'].astype(str), paper_hashes(papers_df)))
+        key = [PROMPT_VERSION, kind, self.provider, self.model_name, token_budget, candidates, normalize_interests(user_interests)]
+        return hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+
+    def _cached_response(self, key: str) -> Optional[str]:
+        entry = _cache.get(key)
+        if entry is not None and fresh(entry, CACHE_MAX_AGE):
+            return entry["text"]
+        return None
+
+    def _store_response(self, key: str, response: str):
+        if response and not response.startswith("Error"):
+            _cache.put(key, {"text": response, "checked_at": time.time()})
+
+    def analyze_papers(self, papers_df, user_interests, token_budget: int = PROMPT_TOKEN_BUDGET, use_cache: bool = True):
+        with span("llm.analyze", papers=len(papers_df)) as current:
+            key = self.cache_key(papers_df, user_interests, token_budget)
+            cached = self._cached_response(key) if use_cache else None
+            current.set("cache", "hit" if cached is not None else "miss")
+            if cached is not None:
+                return cached
+
+            response = self._generate(self.build_prompt(papers_df, user_interests, token_budget))
+            if use_cache:
+                self._store_response(key, response)
+            return response
+
+    def analyze_papers_stream(self, papers_df, user_interests, token_budget: int = PROMPT_TOKEN_BUDGET,
+                              use_cache: bool = True) -> Iterator[str]:
+        # Same as analyze_papers, but yields the reply as it is generated. A
+        # cached reply is yielded in one piece.
+        key = self.cache_key(papers_df, user_interests, token_budget)
+        cached = self._cached_response(key) if use_cache else None
+        if cached is not None:
+            record("llm.stream", time.time_ns(), cache="hit", papers=len(papers_df))
+            yield cached
+            return
+
+        chunks = []
+        for chunk in self._generate_stream(self.build_prompt(papers_df, user_interests, token_budget)):
+            chunks.append(chunk)
+            yield chunk
+        if use_cache:
+            self._store_response(key, "".join(chunks))
+
+    def score_shard(self, shard_df, user_interests, use_cache: bool = True) -> Dict[str, float]:
+        key = self.cache_key(shard_df, user_interests, SHARD_TOKEN_BUDGET, kind="score")
+        response = self._cached_response(key) if use_cache else None
+        if response is None:
+            papers_context, _ = pack_papers(shard_df, SHARD_TOKEN_BUDGET)
+            prompt = f"""
+        You are an expert research assistant. The user is interested in: "{user_interests}".
+
+        Score each paper below from 0 to 10 for how relevant it is to the user's interest.
+
+        {papers_context}
+
+        Return ONLY a valid JSON array of objects with the fields "id" (the ID given above) and "score".
+        """
+            response = self._generate(prompt)
+            if response.startswith("Error"):
+                raise RuntimeError(response)
+            if use_cache:
+                self._store_response(key, response)
+        scores = {}
+        for item in JsonArrayParser().feed(response):
+            try:
+                scores[str(item["id"])] = float(item["score"])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return scores
+
+    def shortlist(self, papers_df, user_interests, shard_size: int = SHARD_SIZE, keep: int = SHORTLIST_SIZE,
+                  max_workers: int = LLM_WORKERS, use_cache: bool = True):
+        # Map: score shards of the candidates concurrently. Reduce: keep the
+        # best-scored papers, breaking ties (and covering shards whose request
+        # failed) by the existing ranking.
+        papers_df = rank_papers(papers_df)
+        if len(papers_df) <= keep:
+            return papers_df
+        shards = [papers_df.iloc[start:start + shard_size] for start in range(0, len(papers_df), shard_size)]
+
+        def score(shard):
+            try:
+                return self.score_shard(shard, user_interests, use_cache=use_cache)
+            except Exception as e:
+                print(f"Scoring a shard of {len(shard)} papers failed: {e}")
+                return {}
 
+        scores = {}
+        with span("llm.shortlist", papers=len(papers_df), shards=len(shards), keep=keep), \
+                ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="catalogger-llm") as pool:
+            for shard_scores in pool.map(propagate(score), shards):
+                scores.update(shard_scores)
+        ranked = sorted(range(len(papers_df)), key=lambda pos: (-scores.get(str(papers_df.index[pos]), -1.0), pos))
+        return papers_df.iloc[sorted(ranked[:keep])]
+
+    def analyze_papers_sharded(self, papers_df, user_interests, token_budget: int = PROMPT_TOKEN_BUDGET,
+                               use_cache: bool = True):
+        finalists = self.shortlist(papers_df, user_interests, use_cache=use_cache)
+        return self.analyze_papers(finalists, user_interests, token_budget=token_budget, use_cache=use_cache)
+
+    def build_prompt(self, papers_df, user_interests, token_budget: int = PROMPT_TOKEN_BUDGET) -> str:
+        instructions = self._prompt(user_interests, "", len(papers_df))
+        papers_context, count = pack_papers(papers_df, token_budget - estimate_tokens(instructions))
+        return self._prompt(user_interests, papers_context, count)
+
+    def _prompt(self, user_interests, papers_context, count):
         prompt = f"""
         You are an expert research assistant. The user is interested in: "{user_interests}".
         
-        Here are the top {len(papers_df)} most relevant papers I found based on semantic search:
+        Here are the top {count} most relevant papers I found based on semantic search:
         
         {papers_context}
         
@@ -43,34 +307,105 @@ class LLMInterface:
         
         Return ONLY a valid JSON array of these objects. Do not include markdown formatting like ```json ... ```.
         """
-        
-        return self._generate(prompt)
+        return prompt
+
+    def _model_not_found(self, e: Exception) -> Optional[str]:
+        if "404" not in str(e) and "not found" not in str(e).lower():
+            return None
+        try:
+            models = self._gemini(lambda: [m.name for m in self.genai.list_models() if 'generateContent' in m.supported_generation_methods])
+            return f"Error: The selected model was not found. Your API key has access to: {', '.join(models)}. \n\nOriginal Error: {e}"
+        except Exception as list_e:
+            return f"Error generating response: {e}. (Also failed to list available models: {list_e})"
+
+    def _messages(self, prompt):
+        return [
+            {"role": "system", "content": "You are a helpful research assistant."},
+            {"role": "user", "content": prompt}
+        ]
+
+    @staticmethod
+    def _error_message(e: Exception) -> str:
+        error_str = str(e)
+        if "API key not valid" in error_str:
+            return "Error: API key not valid. Please check your Google Gemini API key."
+        return f"Error generating response: {error_str}"
 
     def _generate(self, prompt):
+        with span("llm.generate", provider=self.provider, model=self.model_name, prompt_tokens=estimate_tokens(prompt)):
+            return self._complete(prompt)
+
+    def _complete(self, prompt):
         try:
             if self.provider == "Google Gemini":
                 try:
-                    response = self.model.generate_content(prompt)
+                    response = with_retries(lambda: self._gemini(lambda: self.model.generate_content(prompt)))
                     return response.text
                 except Exception as e:
-                    if "404" in str(e) or "not found" in str(e).lower():
-                        try:
-                            models = [m.name for m in genai.list_models() if 'generateContent' in m.supported_generation_methods]
-                            return f"Error: The selected model was not found. Your API key has access to: {', '.join(models)}. \n\nOriginal Error: {e}"
-                        except Exception as list_e:
-                            return f"Error generating response: {e}. (Also failed to list available models: {list_e})"
+                    message = self._model_not_found(e)
+                    if message:
+                        return message
                     raise e
             elif self.provider == "OpenRouter":
-                completion = self.client.chat.completions.create(
+                completion = with_retries(lambda: self.client.chat.completions.create(
                     model=self.model_name,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful research assistant."},
-                        {"role": "user", "content": prompt}
-                    ]
-                )
+                    messages=self._messages(prompt)
+                ))
                 return completion.choices[0].message.content
         except Exception as e:
-            error_str = str(e)
-            if "API key not valid" in error_str:
-                return "Error: API key not valid. Please check your Google Gemini API key."
-            return f"Error generating response: {error_str}"
+            return self._error_message(e)
+
+    def _generate_stream(self, prompt) -> Iterator[str]:
+        # Timed with record() rather than span(): the caller's own spans run
+        # between chunks and must not nest under this one.
+        start = time.time_ns()
+        first_chunk = None
+        chunks = 0
+        error = None
+        try:
+            for text in self._stream(prompt):
+                if first_chunk is None:
+                    first_chunk = time.time_ns()
+                chunks += 1
+                yield text
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record("llm.stream", start, error=error, provider=self.provider, model=self.model_name,
+                   prompt_tokens=estimate_tokens(prompt), chunks=chunks,
+                   first_chunk_ms=(first_chunk - start) / 1e6 if first_chunk is not None else -1.0)
+
+    def _stream(self, prompt) -> Iterator[str]:
+        # Errors before the first chunk are reported like _complete does, as a
+        # single "Error..." chunk; a failure part-way through is raised.
+        started = False
+        try:
+            if self.provider == "Google Gemini":
+                try:
+                    for chunk in with_retries(lambda: self._gemini(lambda: self.model.generate_content(prompt, stream=True))):
+                        text = "".join(part.text for part in chunk.parts)
+                        if text:
+                            started = True
+                            yield text
+                except Exception as e:
+                    message = None if started else self._model_not_found(e)
+                    if message:
+                        yield message
+                        return
+                    raise e
+            elif self.provider == "OpenRouter":
+                stream = with_retries(lambda: self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=self._messages(prompt),
+                    stream=True,
+                ))
+                for chunk in stream:
+                    text = chunk.choices[0].delta.content if chunk.choices else None
+                    if text:
+                        started = True
+                        yield text
+        except Exception as e:
+            if started:
+                raise
+            yield self._error_message(e)
@@ -0,0 +1,89 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+MANIFEST_NAME = "manifest.json"
+STORE_VERSION = 1
+
+# One uncompressed Arrow IPC file per conference plus a JSON manifest of row
+# counts, so listing conferences never opens the data and reads can be
+# memory-mapped and column-selective.
+class PaperStore:
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self.manifest_path = os.path.join(data_dir, MANIFEST_NAME)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.data_dir, f"{name}.arrow")
+
+    def _read_manifest(self) -> Dict:
+        if not os.path.exists(self.manifest_path):
+            return {"version": STORE_VERSION, "conferences": {}}
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {"version": STORE_VERSION, "conferences": {}}
+        manifest.setdefault("conferences", {})
+        return manifest
+
+    def _write_manifest(self, manifest: Dict):
+        os.makedirs(self.data_dir, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def entries(self) -> Dict[str, Dict]:
+        manifest = self._read_manifest()
+        return {
+            name: entry for name, entry in manifest["conferences"].items()
+            if os.path.exists(self.path(name))
+        }
+
+    def row_counts(self) -> Dict[str, int]:
+        return {name: entry["rows"] for name, entry in self.entries().items()}
+
+    def has(self, name: str) -> bool:
+        return name in self.entries()
+
+    def write(self, name: str, df: pd.DataFrame, **extra):
+        os.makedirs(self.data_dir, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        path = self.path(name)
+        tmp_path = path + ".tmp"
+        # Uncompressed so reads can map the file instead of decoding it.
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, path)
+        self.record(name, table.num_rows, table.column_names, **extra)
+
+    def record(self, name: str, rows: int, columns: List[str], **extra):
+        manifest = self._read_manifest()
+        entry = manifest["conferences"].get(name, {})
+        entry.update(extra)
+        entry.update({
+            "file": os.path.basename(self.path(name)),
+            "rows": int(rows),
+            "columns": list(columns),
+            "updated": time.time(),
+        })
+        manifest["conferences"][name] = entry
+        manifest["version"] = STORE_VERSION
+        self._write_manifest(manifest)
+
+    def read_table(self, name: str, columns: Optional[List[str]] = None) -> pa.Table:
+        return feather.read_table(self.path(name), columns=columns, memory_map=True)
+
+    def read(self, name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        return self.read_table(name, columns).to_pandas()
+
+    def migrate_csv(self, name: str, csv_path: str, **extra) -> pd.DataFrame:
+        # Every column in the legacy CSVs is text; keep empty cells as "" rather than NaN.
+        df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+        self.write(name, df, migrated_from=os.path.basename(csv_path), **extra)
+        return df
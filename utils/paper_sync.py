@@ -0,0 +1,222 @@
+import json
+import os
+import shutil
+import time
+from typing import Dict, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from utils.paper_store import PaperStore
+
+PAGE_SIZE = 1000
+PAPER_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("title", pa.string()),
+    ("abstract", pa.string()),
+    ("authors", pa.string()),
+    ("author_emails", pa.string()),
+    ("keywords", pa.string()),
+    ("pdf_url", pa.string()),
+    # Last modification time in ms since the epoch; the incremental sync
+    # watermark.
+    ("mdate", pa.int64()),
+])
+
+def _value(note, field: str, default):
+    return note.content.get(field, {}).get('value', default)
+
+def note_to_row(note) -> Dict:
+    return {
+        "id": note.id,
+        "title": _value(note, 'title', ''),
+        "abstract": _value(note, 'abstract', ''),
+        "authors": ", ".join(_value(note, 'authors', [])),
+        "author_emails": ", ".join(_value(note, 'authorids', [])),
+        "keywords": ", ".join(_value(note, 'keywords', [])),
+        "pdf_url": f"https://openreview.net/pdf?id={note.id}",
+        "mdate": getattr(note, 'tmdate', None) or getattr(note, 'mdate', None) or getattr(note, 'cdate', None),
+    }
+
+def _conform(batch: pa.RecordBatch) -> pa.RecordBatch:
+    # Older stores (migrated CSVs) may lack columns such as mdate.
+    columns = []
+    for field in PAPER_SCHEMA:
+        if field.name in batch.schema.names:
+            columns.append(batch.column(field.name).cast(field.type))
+        else:
+            columns.append(pa.nulls(batch.num_rows, type=field.type))
+    return pa.RecordBatch.from_arrays(columns, schema=PAPER_SCHEMA)
+
+# Pulls a conference from OpenReview one page at a time. Each page is written to
+# its own Arrow part file under data/<name>.sync/ and a checkpoint records the
+# cursor, so an interrupted sync resumes from the last finished page. The
+# parts are then streamed into the store one record batch at a time; nothing
+# ever holds the whole conference in memory.
+#
+# sync(mode="full") downloads everything. mode="incremental" only asks for
+# notes modified since the newest mdate already stored and replaces those rows
+# in the cached file. progress_callback(fraction, text) is called after every
+# page, like the indexing callbacks.
+class PaperSync:
+    def __init__(self, store: PaperStore, client, page_size: int = PAGE_SIZE):
+        self.store = store
+        self.client = client
+        self.page_size = page_size
+
+    def staging_dir(self, name: str) -> str:
+        return os.path.join(self.store.data_dir, f"{name}.sync")
+
+    def _checkpoint_path(self, name: str) -> str:
+        return os.path.join(self.staging_dir(name), "checkpoint.json")
+
+    def _read_checkpoint(self, name: str) -> Optional[Dict]:
+        path = self._checkpoint_path(name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_checkpoint(self, name: str, checkpoint: Dict):
+        path = self._checkpoint_path(name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, path)
+
+    def _part_path(self, name: str, part: int) -> str:
+        return os.path.join(self.staging_dir(name), f"part-{part:05d}.arrow")
+
+    def watermark(self, name: str) -> Optional[int]:
+        entry = self.store.entries().get(name)
+        if entry is None:
+            return None
+        if entry.get("synced_mdate") is not None:
+            return entry["synced_mdate"]
+        table = self.store.read_table(name)
+        if "mdate" not in table.column_names:
+            return None
+        return pc.max(table.column("mdate")).as_py()
+
+    def _fetch_page(self, invitation: str, since: Optional[int], skip: int):
+        kwargs = {"invitation": invitation, "limit": self.page_size, "offset": skip, "sort": "tmdate:asc"}
+        if since is not None:
+            kwargs["mintmdate"] = since
+        return self.client.get_notes(**kwargs)
+
+    @staticmethod
+    def _advance(checkpoint: Dict, mdates: List[int]):
+        # Keyset pagination on (tmdate, position among equal tmdates): a note
+        # edited mid-sync moves to the end of the order instead of shifting
+        # the offsets of the pages still to come.
+        last = mdates[-1]
+        if last is None or last == checkpoint["since"]:
+            checkpoint["skip"] += len(mdates)
+        else:
+            checkpoint["since"] = last
+            checkpoint["skip"] = sum(1 for mdate in mdates if mdate == last)
+
+    def sync(self, name: str, invitation: str, mode: str = "full", progress_callback=None, **extra) -> Dict:
+        if mode not in ("full", "incremental"):
+            raise ValueError(f"Unknown sync mode: {mode}")
+        since = self.watermark(name) if mode == "incremental" else None
+        if since is None:
+            mode = "full"
+
+        # The total is unknown until the last page arrives; a full refresh
+        # measures progress against the size of the copy it replaces.
+        expected = self.store.entries().get(name, {}).get("rows") if mode == "full" else None
+
+        checkpoint = self._read_checkpoint(name)
+        if checkpoint is None or checkpoint.get("invitation") != invitation or checkpoint.get("mode") != mode:
+            shutil.rmtree(self.staging_dir(name), ignore_errors=True)
+            os.makedirs(self.staging_dir(name))
+            checkpoint = {
+                "invitation": invitation, "mode": mode, "watermark": since,
+                "since": since, "skip": 0, "fetched": 0, "parts": 0, "done": False,
+            }
+            self._write_checkpoint(name, checkpoint)
+        elif checkpoint["fetched"]:
+            print(f"Resuming {name} sync after {checkpoint['fetched']} notes")
+
+        while not checkpoint["done"]:
+            notes = self._fetch_page(invitation, checkpoint["since"], checkpoint["skip"])
+            if notes:
+                rows = [note_to_row(note) for note in notes]
+                batch = pa.RecordBatch.from_pylist(rows, schema=PAPER_SCHEMA)
+                part_path = self._part_path(name, checkpoint["parts"])
+                with pa.OSFile(part_path + ".tmp", 'wb') as sink, pa.ipc.new_file(sink, PAPER_SCHEMA) as writer:
+                    writer.write_batch(batch)
+                os.replace(part_path + ".tmp", part_path)
+                checkpoint["parts"] += 1
+                checkpoint["fetched"] += len(notes)
+                self._advance(checkpoint, [row["mdate"] for row in rows])
+            checkpoint["done"] = len(notes) < self.page_size
+            self._write_checkpoint(name, checkpoint)
+            if progress_callback:
+                fetched = checkpoint["fetched"]
+                if checkpoint["done"]:
+                    fraction = 1.0
+                else:
+                    fraction = min(fetched / expected, 0.99) if expected else 0.0
+                progress_callback(fraction, f"Fetched {fetched} papers from OpenReview...")
+
+        if mode == "full" and checkpoint["fetched"] == 0:
+            shutil.rmtree(self.staging_dir(name), ignore_errors=True)
+            raise ValueError(f"No papers found for invitation {invitation}. Please check if the conference ID is correct or if the papers are public.")
+        stats = self._commit(name, checkpoint, **extra)
+        shutil.rmtree(self.staging_dir(name), ignore_errors=True)
+        return stats
+
+    def _staged_batches(self, name: str, parts: int) -> Iterator[pa.RecordBatch]:
+        for part in range(parts):
+            with pa.memory_map(self._part_path(name, part)) as source:
+                reader = pa.ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    yield reader.get_batch(i)
+
+    def _stored_batches(self, name: str) -> Iterator[pa.RecordBatch]:
+        with pa.memory_map(self.store.path(name)) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield _conform(reader.get_batch(i))
+
+    def _commit(self, name: str, checkpoint: Dict, **extra) -> Dict:
+        parts = checkpoint["parts"]
+        # Later pages win: a note edited during the sync shows up again at
+        # the end of the tmdate order, so keep only its last copy.
+        latest: Dict[str, tuple] = {}
+        for part, batch in enumerate(self._staged_batches(name, parts)):
+            for row, paper_id in enumerate(batch.column("id").to_pylist()):
+                latest[paper_id] = (part, row)
+        changed = pa.array(list(latest), type=pa.string())
+
+        merging = checkpoint["mode"] == "incremental" and self.store.has(name)
+        kept = 0
+        rows = 0
+        watermark = checkpoint.get("watermark")
+        os.makedirs(self.store.data_dir, exist_ok=True)
+        tmp_path = self.store.path(name) + ".tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, PAPER_SCHEMA) as writer:
+            if merging:
+                for batch in self._stored_batches(name):
+                    batch = batch.filter(pc.invert(pc.is_in(batch.column("id"), value_set=changed)))
+                    writer.write_batch(batch)
+                    kept += batch.num_rows
+            for part, batch in enumerate(self._staged_batches(name, parts)):
+                keep = [latest[paper_id] == (part, row) for row, paper_id in enumerate(batch.column("id").to_pylist())]
+                batch = batch.filter(pa.array(keep))
+                writer.write_batch(batch)
+                rows += batch.num_rows
+                newest = pc.max(batch.column("mdate")).as_py()
+                if newest is not None and (watermark is None or newest > watermark):
+                    watermark = newest
+        os.replace(tmp_path, self.store.path(name))
+
+        self.store.record(name, kept + rows, PAPER_SCHEMA.names, synced_mdate=watermark, synced_at=time.time(), **extra)
+        stats = {"mode": checkpoint["mode"], "fetched": checkpoint["fetched"], "updated": rows, "kept": kept, "rows": kept + rows}
+        print(f"Synced {name} ({stats['mode']}): {rows} new or changed papers, {kept + rows} total")
+        return stats
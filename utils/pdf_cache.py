@@ -0,0 +1,9 @@
+from utils.json_cache import JsonFileCache
+
+# One small JSON file per PDF URL holding the extracted first-page text, the
+# emails found in it, and the validators (ETag / Last-Modified) from the
+# response that produced it. Total size is capped; the least recently used
+# entries are evicted first.
+class PdfTextCache(JsonFileCache):
+    def __init__(self, cache_dir: str, max_bytes: int = 64 * 1024 * 1024):
+        super().__init__(cache_dir, max_bytes=max_bytes, key_field="url")
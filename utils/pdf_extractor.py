@@ -1,21 +1,266 @@
 import requests
+import hashlib
 import io
+import os
 import re
-from pypdf import PdfReader
+import threading
+import time
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from utils.json_cache import fresh
+from utils.pdf_cache import PdfTextCache
+from utils.tracing import span
+
+CACHE_DIR = os.path.join("data", "pdf_cache")
+# Submission PDFs rarely change once a conference is published; inside this
+# window a cached entry is served without touching the network, after it the
+# entry is revalidated with ETag / Last-Modified.
+CACHE_MAX_AGE = 7 * 24 * 3600
+REQUEST_TIMEOUT = 10
+# "range" fetches only the byte ranges pypdf needs for page 1 (falling back to
+# a capped streaming read when the server ignores Range); "full" downloads the
+# whole file as before.
+DOWNLOAD_MODE = os.environ.get("CATALOGGER_PDF_DOWNLOAD", "range")
+RANGE_BLOCK_SIZE = 64 * 1024
+# Ceilings per paper. Range mode gives up and falls back once it has pulled
+# RANGE_MAX_BYTES; the streaming read aborts past MAX_DOWNLOAD_BYTES.
+RANGE_MAX_BYTES = 2 * 1024 * 1024
+MAX_DOWNLOAD_BYTES = 16 * 1024 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+_cache = PdfTextCache(CACHE_DIR)
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+def get_pdf_cache() -> PdfTextCache:
+    return _cache
+
+class DownloadLimitExceeded(Exception):
+    pass
+
+# Read-only, seekable file object over an HTTP resource that fetches
+# RANGE_BLOCK_SIZE-aligned blocks on demand, so pypdf only pulls the trailer,
+# the cross-reference data and the objects page 1 actually uses.
+class HttpRangeFile(io.RawIOBase):
+    def __init__(self, session, url, size, first_block, block_size=RANGE_BLOCK_SIZE, max_bytes=RANGE_MAX_BYTES):
+        self.session = session
+        self.url = url
+        self.size = size
+        self.block_size = block_size
+        self.max_bytes = max_bytes
+        self.blocks = {0: first_block}
+        self.bytes_fetched = len(first_block)
+        self.requests = 1
+        self.pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.pos = offset
+        elif whence == io.SEEK_CUR:
+            self.pos += offset
+        elif whence == io.SEEK_END:
+            self.pos = self.size + offset
+        self.pos = max(0, self.pos)
+        return self.pos
+
+    def _fetch(self, first, last):
+        start = first * self.block_size
+        end = min((last + 1) * self.block_size, self.size) - 1
+        if self.bytes_fetched + (end - start + 1) > self.max_bytes:
+            raise DownloadLimitExceeded(f"range reads would exceed {self.max_bytes} bytes")
+        response = self.session.get(self.url, headers={"Range": f"bytes={start}-{end}"}, timeout=REQUEST_TIMEOUT)
+        if response.status_code != 206:
+            raise DownloadLimitExceeded(f"server answered {response.status_code} to a range request")
+        data = response.content
+        self.bytes_fetched += len(data)
+        self.requests += 1
+        for block in range(first, last + 1):
+            offset = (block - first) * self.block_size
+            self.blocks[block] = data[offset:offset + self.block_size]
+
+    def read(self, size=-1):
+        if self.pos >= self.size:
+            return b""
+        end = self.size if size is None or size < 0 else min(self.pos + size, self.size)
+        first, last = self.pos // self.block_size, (end - 1) // self.block_size
+        # Coalesce each run of missing blocks into a single request.
+        block = first
+        while block <= last:
+            if block in self.blocks:
+                block += 1
+                continue
+            run_end = block
+            while run_end + 1 <= last and run_end + 1 not in self.blocks:
+                run_end += 1
+            self._fetch(block, run_end)
+            block = run_end + 1
+        data = b"".join(self.blocks[b] for b in range(first, last + 1))
+        offset = self.pos - first * self.block_size
+        chunk = data[offset:offset + (end - self.pos)]
+        self.pos += len(chunk)
+        return chunk
+
+    def readinto(self, buffer):
+        chunk = self.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+INHERITABLE_PAGE_KEYS = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+def _first_page(reader):
+    # reader.pages[0] flattens the whole page tree, touching every page object
+    # in the file; walking down the first kids only reads what page 1 needs.
+    from pypdf import PageObject
+    from pypdf.generic import IndirectObject
+
+    node_ref = reader.trailer["/Root"].raw_get("/Pages")
+    inherited = {}
+    for _ in range(64):
+        node = node_ref.get_object()
+        if node.get("/Type") == "/Page" or "/Kids" not in node:
+            page = PageObject(reader, node_ref if isinstance(node_ref, IndirectObject) else None)
+            page.update(node)
+            for key, value in inherited.items():
+                if key not in page:
+                    page[key] = value
+            return page
+        for key in INHERITABLE_PAGE_KEYS:
+            if key in node:
+                inherited[key] = node.raw_get(key)
+        kids = node["/Kids"]
+        if not kids:
+            return None
+        node_ref = kids[0]
+    return None
+
+def _first_page_text(stream, strict=False):
+    from pypdf import PdfReader
+    reader = PdfReader(stream, strict=strict)
+    page = _first_page(reader)
+    if page is None:
+        return ""
+    return page.extract_text() or ""
+
+def _parse_first_page(content):
+    with io.BytesIO(content) as f:
+        return _first_page_text(f)
+
+def _read_capped(response, limit=MAX_DOWNLOAD_BYTES):
+    length = response.headers.get("Content-Length")
+    if length and length.isdigit() and int(length) > limit:
+        raise DownloadLimitExceeded(f"PDF is {length} bytes, over the {limit} byte limit")
+    chunks = []
+    total = 0
+    for chunk in response.iter_content(chunk_size=RANGE_BLOCK_SIZE):
+        total += len(chunk)
+        if total > limit:
+            raise DownloadLimitExceeded(f"PDF exceeded the {limit} byte limit")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def _download_first_page(pdf_url, headers, mode):
+    # Returns (response, text, content hash or None, bytes transferred); text is
+    # None on a 304.
+    session = get_session()
+    if mode == "range":
+        range_headers = dict(headers, Range=f"bytes=0-{RANGE_BLOCK_SIZE - 1}")
+        with session.get(pdf_url, headers=range_headers, timeout=REQUEST_TIMEOUT, stream=True) as response:
+            if response.status_code == 304:
+                return response, None, None, 0
+            response.raise_for_status()
+            if response.status_code != 206:
+                # Server ignored Range and is sending the whole file.
+                content = _read_capped(response)
+                return response, _parse_first_page(content), hashlib.sha256(content).hexdigest(), len(content)
+
+            first_block = response.content
+            fetched = len(first_block)
+            total_size = response.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+            if total_size.isdigit():
+                stream = HttpRangeFile(session, pdf_url, int(total_size), first_block)
+                try:
+                    # Non-strict pypdf seeks to every object to repair broken
+                    # xref tables; strict mode skips that, and a malformed file
+                    # simply takes the fallback below.
+                    return response, _first_page_text(stream, strict=True), None, stream.bytes_fetched
+                except Exception as e:
+                    print(f"Range read failed for {pdf_url} after {stream.bytes_fetched} bytes ({e}); streaming instead")
+                    fetched = stream.bytes_fetched
+
+        with session.get(pdf_url, timeout=REQUEST_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            content = _read_capped(response)
+            return response, _parse_first_page(content), hashlib.sha256(content).hexdigest(), fetched + len(content)
+
+    response = session.get(pdf_url, headers=headers, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 304:
+        return response, None, None, 0
+    response.raise_for_status()
+    return response, _parse_first_page(response.content), hashlib.sha256(response.content).hexdigest(), len(response.content)
+
+def fetch_first_page(pdf_url, mode=None):
+    with span("pdf.first_page", host=urlparse(pdf_url).netloc) as current:
+        cached = _cache.get(pdf_url)
+        if cached is not None and fresh(cached, CACHE_MAX_AGE):
+            current.set("cache", "hit")
+            return cached
+
+        headers = {}
+        if cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        response, text, content_hash, bytes_transferred = _download_first_page(pdf_url, headers, mode or DOWNLOAD_MODE)
+        current.set("bytes", bytes_transferred)
+        if text is None and cached is not None:
+            current.set("cache", "not_modified")
+            cached["checked_at"] = time.time()
+            _cache.put(pdf_url, cached)
+            return cached
+        if text is None:
+            raise ValueError(f"Got 304 Not Modified for {pdf_url} without a cached copy")
+
+        current.set("cache", "miss" if cached is None else "changed")
+        entry = {
+            "text": text,
+            "emails": find_emails_in_text(text) if text else [],
+            "content_sha256": content_hash,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "bytes_transferred": bytes_transferred,
+            "checked_at": time.time(),
+        }
+        _cache.put(pdf_url, entry)
+        return entry
 
 def extract_text_from_first_page(pdf_url):
     try:
-        response = requests.get(pdf_url, timeout=10)
-        response.raise_for_status()
-        
-        with io.BytesIO(response.content) as f:
-            reader = PdfReader(f)
-            if len(reader.pages) > 0:
-                return reader.pages[0].extract_text()
+        return fetch_first_page(pdf_url)["text"]
     except Exception as e:
         print(f"Error extracting text from PDF {pdf_url}: {e}")
         return ""
-    return ""
 
 def find_emails_in_text(text):
     emails = []
@@ -34,7 +279,8 @@ def find_emails_in_text(text):
     return list(set(emails))
 
 def get_emails_from_pdf(pdf_url):
-    text = extract_text_from_first_page(pdf_url)
-    if text:
-        return find_emails_in_text(text)
-    return []
+    try:
+        return list(fetch_first_page(pdf_url)["emails"])
+    except Exception as e:
+        print(f"Error extracting text from PDF {pdf_url}: {e}")
+        return []
@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+
+import pandas as pd
+
+from utils.data_fetcher import load_papers
+from utils.encoders import load_model, model_identity
+from utils.search_engine import SearchEngine, needs_indexing
+from utils.tracing import span
+
+DEFAULT_MODEL = 'all-MiniLM-L6-v2'
+IDLE_TTL_SECONDS = 15 * 60
+
+class _Entry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.engine: Optional[SearchEngine] = None
+        self.refs = 0
+        self.last_used = time.monotonic()
+
+# Handed to each session. Dropping the lease (or the session state holding it)
+# gives the reference back to the registry.
+class EngineLease:
+    def __init__(self, registry: "EngineRegistry", conference_name: str, engine: SearchEngine):
+        self.conference_name = conference_name
+        self.engine = engine
+        self._finalizer = weakref.finalize(self, registry._release, conference_name)
+
+    def release(self):
+        self._finalizer()
+
+# One model and one read-only SearchEngine per conference for the whole
+# process, shared by every Streamlit session.
+class EngineRegistry:
+    def __init__(self, model_name: str = DEFAULT_MODEL, idle_ttl: float = IDLE_TTL_SECONDS, model=None, **engine_kwargs):
+        self.model_name = model_name
+        self.idle_ttl = idle_ttl
+        self.engine_kwargs = engine_kwargs
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        # An already loaded model may be passed in; otherwise it is loaded on
+        # first use.
+        self._model = model
+        self._warming = False
+        self._entries: Dict[str, _Entry] = {}
+        self._reaper: Optional[threading.Thread] = None
+
+    def get_model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    print(f"Loading embedding model {self.model_name}...")
+                    self._model = load_model(self.model_name, self.engine_kwargs.get('encoder_backend', 'torch'))
+        return self._model
+
+    def warm_model_async(self):
+        if self._model is not None or self._warming:
+            return
+        self._warming = True
+
+        def warm():
+            try:
+                self.get_model()
+            except Exception as e:
+                print(f"Background model warm-up failed: {e}")
+            finally:
+                self._warming = False
+
+        threading.Thread(target=warm, name="catalogger-model-warmup", daemon=True).start()
+
+    def _new_engine(self) -> SearchEngine:
+        return SearchEngine(model_name=self.model_name, model=self.get_model(), **self.engine_kwargs)
+
+    def is_loaded(self, conference_name: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(conference_name)
+            return entry is not None and entry.engine is not None
+
+    def needs_indexing(self, df: pd.DataFrame, conference_name: str) -> bool:
+        if self.is_loaded(conference_name):
+            return False
+        model_id = model_identity(self.model_name, self.engine_kwargs.get('encoder_backend', 'torch'))
+        return needs_indexing(df, conference_name, model_id, self.engine_kwargs.get('storage_dtype', 'float32'))
+
+    def acquire(self, conference_name: str, df: Optional[pd.DataFrame] = None, progress_callback=None) -> EngineLease:
+        with self._lock:
+            entry = self._entries.setdefault(conference_name, _Entry())
+            entry.refs += 1
+            entry.last_used = time.monotonic()
+
+        try:
+            with span("registry.acquire", conference=conference_name) as current, entry.lock:
+                current.set("loaded", entry.engine is not None)
+                if entry.engine is None:
+                    engine = self._new_engine()
+                    engine.load_data(df if df is not None else load_papers(conference_name), conference_name, progress_callback)
+                    entry.engine = engine
+                # Taken under the lock: an invalidate() right after it is
+                # released must not leave this lease without an engine.
+                engine = entry.engine
+        except Exception:
+            self._release(conference_name)
+            raise
+
+        self.evict_idle()
+        self._start_reaper()
+        return EngineLease(self, conference_name, engine)
+
+    def invalidate(self, conference_name: str):
+        # Drops the cached engine after the conference's data changed; the next
+        # acquire rebuilds it (re-encoding only new or edited papers). Existing
+        # leases keep the engine they were handed.
+        with self._lock:
+            entry = self._entries.get(conference_name)
+        if entry is not None:
+            with entry.lock:
+                entry.engine = None
+
+    def _release(self, conference_name: str):
+        with self._lock:
+            entry = self._entries.get(conference_name)
+            if entry is not None:
+                entry.refs = max(entry.refs - 1, 0)
+                entry.last_used = time.monotonic()
+        self.evict_idle()
+
+    def evict_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            for name, entry in list(self._entries.items()):
+                if entry.refs == 0 and now - entry.last_used >= self.idle_ttl:
+                    print(f"Evicting idle search index for {name}")
+                    del self._entries[name]
+
+    def _start_reaper(self):
+        # Evicts idle engines even when nothing is acquired or released. The
+        # thread only holds a weak reference, so it ends with the registry.
+        with self._lock:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=_reap, args=(weakref.ref(self), max(self.idle_ttl / 4, 1.0)),
+                                            name="catalogger-registry-reaper", daemon=True)
+        self._reaper.start()
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                name: {"refs": entry.refs, "loaded": entry.engine is not None, "idle_s": time.monotonic() - entry.last_used}
+                for name, entry in self._entries.items()
+            }
+
+def _reap(registry_ref, interval: float):
+    while True:
+        time.sleep(interval)
+        registry = registry_ref()
+        if registry is None:
+            return
+        registry.evict_idle()
+        del registry
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> EngineRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = EngineRegistry(
+                    encoder_backend=os.environ.get("CATALOGGER_ENCODER_BACKEND", "torch"),
+                    indexing_mode=os.environ.get("CATALOGGER_INDEXING_MODE", "serial"),
+                    index_backend=os.environ.get("CATALOGGER_INDEX_BACKEND", "exact"),
+                )
+    return _registry
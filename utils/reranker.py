@@ -0,0 +1,90 @@
+import os
+import threading
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import LRUCache
+from utils.search_engine import normalize_query
+from utils.tracing import current_span, traced
+
+RERANK_MODEL = os.environ.get("CATALOGGER_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# How many reranked candidates are handed to the LLM.
+RERANK_TOP_N = int(os.environ.get("CATALOGGER_RERANK_TOP_N", "15"))
+RERANK_BATCH_SIZE = 32
+
+def rerank_enabled(secrets=None) -> bool:
+    # Off unless the deployment turns it on, through the environment or a
+    # CATALOGGER_RERANK entry in Streamlit secrets.
+    value = os.environ.get("CATALOGGER_RERANK")
+    if value is None and secrets is not None:
+        try:
+            value = secrets.get("CATALOGGER_RERANK")
+        except Exception:
+            value = None
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+# Scores (query, title + abstract) pairs with a small cross-encoder on the
+# CPU. Scores are cached per (model, query, paper id), so re-running a search
+# or paging through more recommendations only scores papers it has not seen.
+class Reranker:
+    def __init__(self, model_name: str = RERANK_MODEL, batch_size: int = RERANK_BATCH_SIZE, model=None,
+                 cache: Optional[LRUCache] = None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = model
+        self._lock = threading.Lock()
+        self.cache = cache if cache is not None else LRUCache(maxsize=50000, ttl=24 * 3600)
+
+    @property
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                # Imported here so that importing this module does not pull in torch.
+                from sentence_transformers import CrossEncoder
+                print(f"Loading cross-encoder {self.model_name}...")
+                self._model = CrossEncoder(self.model_name, device='cpu')
+            return self._model
+
+    @traced("rerank")
+    def scores(self, query: str, papers_df: pd.DataFrame) -> np.ndarray:
+        query = normalize_query(query)
+        ids = papers_df['id'].astype(str).tolist()
+        scores = np.empty(len(ids), dtype=np.float32)
+        missing: List[int] = []
+        for pos, paper_id in enumerate(ids):
+            cached = self.cache.get((self.model_name, query, paper_id))
+            if cached is None:
+                missing.append(pos)
+            else:
+                scores[pos] = cached
+        current_span().set("cached", len(ids) - len(missing))
+        if missing:
+            titles = papers_df['title'].fillna('').astype(str).tolist()
+            abstracts = papers_df['abstract'].fillna('').astype(str).tolist()
+            pairs = [(query, f"{titles[pos]}. {abstracts[pos]}") for pos in missing]
+            predicted = np.asarray(self.model.predict(pairs, batch_size=self.batch_size), dtype=np.float32).reshape(-1)
+            for pos, score in zip(missing, predicted):
+                scores[pos] = score
+                self.cache.put((self.model_name, query, ids[pos]), float(score))
+        return scores
+
+    def rerank(self, query: str, papers_df: pd.DataFrame, top_n: int = RERANK_TOP_N) -> pd.DataFrame:
+        # Best top_n candidates by cross-encoder score, with the score added as
+        # rerank_score. Row labels are kept so the LLM's ids still resolve.
+        if papers_df.empty:
+            return papers_df
+        result = papers_df.copy()
+        result['rerank_score'] = self.scores(query, papers_df)
+        return result.sort_values('rerank_score', ascending=False, kind='stable').head(top_n)
+
+_reranker = None
+_reranker_lock = threading.Lock()
+
+def get_reranker() -> Reranker:
+    global _reranker
+    with _reranker_lock:
+        if _reranker is None:
+            _reranker = Reranker()
+        return _reranker
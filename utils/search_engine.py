@@ -1,65 +1,256 @@
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from utils.data_fetcher import DATA_DIR, get_safe_name
+from utils.embedding_store import EmbeddingStore, hash_texts
+from utils.vector_index import build_index, search_rows
+from utils.facet_index import Facets, normalize_filters
+from utils.cache import LRUCache
+from utils.encoders import encode_rows, load_model, model_identity
+from utils.lexical_index import BM25Index
+from utils.tracing import span
+from typing import Dict, List, Optional
 import os
-import pickle
+
+RRF_K = 60
+RETRIEVAL_MODES = ("semantic", "hybrid")
+FUSION_METHODS = ("rrf", "weighted")
+# How deep each retriever looks before hybrid fusion picks the final top_k.
+HYBRID_DEPTH = 200
+# Filtered searches score subsets up to this size exactly, whatever the index
+# backend; only larger ones use HNSW's filtered graph walk.
+EXACT_FILTER_MAX = 20000
+
+# Shared by every SearchEngine in the process: query embeddings depend only on
+# the model, results on the conference's index version.
+QUERY_EMBEDDING_CACHE = LRUCache(maxsize=4096, ttl=24 * 3600)
+RESULT_CACHE = LRUCache(maxsize=512, ttl=3600)
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+def paper_keys(df: pd.DataFrame):
+    titles = df['title'].fillna('')
+    abstracts = df['abstract'].fillna('')
+    texts = (titles + ". " + abstracts).tolist()
+    return df['id'].astype(str).tolist(), texts, hash_texts(texts)
+
+def get_embedding_store(conference_name: str, model_id: str, storage_dtype: str = 'float32') -> EmbeddingStore:
+    return EmbeddingStore(DATA_DIR, get_safe_name(conference_name), model_id, dtype=storage_dtype)
+
+def needs_indexing(df: pd.DataFrame, conference_name: str, model_id: str, storage_dtype: str = 'float32') -> bool:
+    # Reads only the store's manifest and keys, so no model has to be loaded.
+    ids, _, text_hashes = paper_keys(df)
+    return not get_embedding_store(conference_name, model_id, storage_dtype).is_current(ids, text_hashes)
 
 class SearchEngine:
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
-        self.model = SentenceTransformer(model_name, device='cpu')
+    def __init__(self, model_name='all-MiniLM-L6-v2', storage_dtype='float32', index_backend='exact', model=None,
+                 encoder_backend='torch', indexing_mode='serial', index_workers=None,
+                 retrieval='hybrid', fusion='rrf', semantic_weight=0.7):
+        if retrieval not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {retrieval}. Choose from {', '.join(RETRIEVAL_MODES)}")
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion method: {fusion}. Choose from {', '.join(FUSION_METHODS)}")
+        self.model_name = model_name
+        self.storage_dtype = storage_dtype
+        self.index_backend = index_backend
+        self.encoder_backend = encoder_backend
+        self.indexing_mode = indexing_mode
+        self.index_workers = index_workers
+        self.retrieval = retrieval
+        self.fusion = fusion
+        self.semantic_weight = semantic_weight
+        self.model_id = model_identity(model_name, encoder_backend)
+        self.model = model if model is not None else load_model(model_name, encoder_backend)
         self.embeddings = None
+        self.index = None
+        self.index_version = None
+        self.lexical = None
+        self.facets = None
         self.df = None
         self.conference_name = None
 
+    def _get_store(self, conference_name: str) -> EmbeddingStore:
+        return get_embedding_store(conference_name, self.model_id, self.storage_dtype)
+
+    def needs_indexing(self, df: pd.DataFrame, conference_name: str) -> bool:
+        return needs_indexing(df, conference_name, self.model_id, self.storage_dtype)
+
     def load_data(self, df: pd.DataFrame, conference_name: str, progress_callback=None):
         self.df = df
         self.conference_name = conference_name
-        self._load_or_compute_embeddings(progress_callback)
+        with span("search.embeddings", conference=conference_name, papers=len(df)):
+            self._load_or_compute_embeddings(progress_callback)
+
+        store = self._get_store(conference_name)
+        self.index_version = store.version()
+        with span("search.build_index", backend=self.index_backend):
+            self.index = build_index(self.index_backend, self.embeddings, store.index_path(self.index_backend), self.index_version)
+        if self.retrieval == "hybrid":
+            lexical_path = os.path.join(DATA_DIR, f"{get_safe_name(conference_name)}_bm25.npz")
+            with span("search.build_bm25"):
+                self.lexical = BM25Index.load_or_build(df, lexical_path)
+            self.index_version = f"{self.index_version}:{self.lexical.version[:16]}"
+        with span("search.build_facets"):
+            self.facets = Facets.build(df)
 
     def _load_or_compute_embeddings(self, progress_callback=None):
-        safe_name = self.conference_name.replace(" ", "_").lower()
-        emb_path = os.path.join("data", f"{safe_name}_embeddings.pkl")
+        store = self._get_store(self.conference_name)
+        ids, text_data, text_hashes = paper_keys(self.df)
 
-        if os.path.exists(emb_path):
-            with open(emb_path, 'rb') as f:
-                self.embeddings = pickle.load(f)
+        with span("embeddings.load"):
+            embeddings = store.load(ids, text_hashes)
+        if embeddings is not None:
+            self.embeddings = embeddings
             if progress_callback:
                 progress_callback(1.0, "Loaded cached embeddings!")
-        else:
+            return
+
+        previous, source_rows, stats = store.reuse_plan(ids, text_hashes)
+        to_encode = np.flatnonzero(source_rows < 0)
+        if previous is None:
             print("Computing embeddings (this happens once per conference)...")
-            titles = self.df['title'].fillna('')
-            abstracts = self.df['abstract'].fillna('')
-            text_data = (titles + ". " + abstracts).tolist()
-            
-            batch_size = 32
-            total_papers = len(text_data)
-            embeddings_list = []
-            
-            for i in range(0, total_papers, batch_size):
-                batch = text_data[i : i + batch_size]
-                batch_emb = self.model.encode(batch)
-                embeddings_list.append(batch_emb)
-                
-                if progress_callback:
-                    progress = min((i + batch_size) / total_papers, 1.0)
-                    progress_callback(progress, f"Indexing paper {min(i + batch_size, total_papers)}/{total_papers}...")
-            
-            self.embeddings = np.vstack(embeddings_list)
-            
-            with open(emb_path, 'wb') as f:
-                pickle.dump(self.embeddings, f)
-
-    def search(self, query: str, top_k: int = 50) -> pd.DataFrame:
-        if self.embeddings is None:
+        else:
+            summary = f"Re-indexing: {stats['new']} new, {stats['edited']} edited, {stats['removed']} removed, {stats['reused']} unchanged"
+            print(summary)
+            if progress_callback:
+                progress_callback(0.0, summary)
+
+        embeddings = None
+        if previous is not None:
+            embeddings = np.empty((len(ids), previous.shape[1]), dtype=np.float32)
+            reused = source_rows >= 0
+            embeddings[reused] = previous[source_rows[reused]]
+            del previous
+
+        with span("embeddings.encode", rows=len(to_encode), mode=self.indexing_mode):
+            embeddings = encode_rows(
+                self.model, text_data, to_encode, embeddings, progress_callback,
+                mode=self.indexing_mode, model_name=self.model_name, backend=self.encoder_backend, workers=self.index_workers,
+            )
+
+        if embeddings is None:
+            embeddings = np.empty((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        self.embeddings = store.save(embeddings, ids, text_hashes)
+
+    def search(self, query: str, top_k: int = 50, filters: Optional[Dict[str, List[str]]] = None) -> pd.DataFrame:
+        return self.search_many([query], top_k=top_k, filters=filters)[0]
+
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        keys = [(self.model_id, normalize_query(q)) for q in queries]
+        cached = [QUERY_EMBEDDING_CACHE.get(key) for key in keys]
+
+        missing = sorted({key[1] for key, emb in zip(keys, cached) if emb is None})
+        if missing:
+            with span("search.encode_queries", queries=len(missing)):
+                encoded = self.model.encode(missing, normalize_embeddings=True)
+            fresh = {}
+            for text, emb in zip(missing, encoded):
+                fresh[text] = np.asarray(emb, dtype=np.float32)
+                QUERY_EMBEDDING_CACHE.put((self.model_id, text), fresh[text])
+            cached = [emb if emb is not None else fresh[key[1]] for key, emb in zip(keys, cached)]
+
+        return np.stack(cached)
+
+    def search_many(self, queries: List[str], top_k: int = 50, query_embeddings: Optional[np.ndarray] = None,
+                    filters: Optional[Dict[str, List[str]]] = None) -> List[pd.DataFrame]:
+        # filters, e.g. {"keywords": ["diffusion"], "authors": [...]}, are
+        # resolved to row ids through the facet indexes before scoring, so a
+        # filtered query still returns a full top_k of matching papers.
+        if self.index is None:
             raise ValueError("Data not loaded. Call load_data() first.")
+        if not queries:
+            return []
+
+        filter_key = normalize_filters(filters)
+        allowed = self.facets.select(filters) if filter_key else None
+        facets_version = self.facets.version if filter_key else None
+        result_keys = [
+            (self.conference_name, self.index_backend, self.retrieval, self.fusion, self.index_version, normalize_query(q), top_k,
+             filter_key, facets_version)
+            for q in queries
+        ]
+        hits = [RESULT_CACHE.get(key) for key in result_keys]
+        pending = [i for i, hit in enumerate(hits) if hit is None]
+        if allowed is not None and len(allowed) == 0:
+            hits = [(np.empty(0, dtype=np.float32), allowed) for _ in queries]
+            pending = []
+
+        with span("search.query", queries=len(queries), cached=len(queries) - len(pending), top_k=top_k,
+                  filtered=-1 if allowed is None else len(allowed)):
+            if pending:
+                if query_embeddings is None:
+                    query_embeddings = self.encode_queries([queries[i] for i in pending])
+                else:
+                    query_embeddings = np.asarray(query_embeddings, dtype=np.float32)[pending]
+                depth = top_k if self.lexical is None else max(top_k, HYBRID_DEPTH)
+                with span("search.vector", backend=self.index_backend, depth=depth):
+                    scores, top_indices = self._vector_search(query_embeddings, depth, allowed)
+                with span("search.fuse" if self.lexical is not None else "search.collect"):
+                    for j, i in enumerate(pending):
+                        if self.lexical is None:
+                            hits[i] = (scores[j], top_indices[j])
+                        else:
+                            hits[i] = self._fuse_lexical(queries[i], query_embeddings[j], scores[j], top_indices[j], depth, top_k, allowed)
+                        RESULT_CACHE.put(result_keys[i], hits[i])
+
+        results = []
+        for row_scores, rows in hits:
+            result = self.df.iloc[rows].copy()
+            result['similarity_score'] = row_scores
+            results.append(result)
+        return results
+
+    def _vector_search(self, query_embeddings: np.ndarray, depth: int, allowed: Optional[np.ndarray]):
+        if allowed is None or self.index_backend == "exact":
+            return self.index.search(query_embeddings, depth, rows=allowed)
+        if len(allowed) <= EXACT_FILTER_MAX:
+            return search_rows(self.embeddings, query_embeddings, allowed, depth)
+        try:
+            return self.index.search(query_embeddings, depth, rows=allowed)
+        except RuntimeError:
+            # The filtered graph walk found fewer than depth neighbours.
+            return search_rows(self.embeddings, query_embeddings, allowed, depth)
+
+    def _fuse_lexical(self, query: str, query_embedding: np.ndarray, vector_scores: np.ndarray, vector_rows: np.ndarray, depth: int, top_k: int,
+                      allowed: Optional[np.ndarray] = None):
+        lexical_scores, lexical_rows = self.lexical.search(query, depth, rows=allowed)
+        if len(lexical_rows) == 0:
+            return vector_scores[:top_k], vector_rows[:top_k]
+
+        rows = np.union1d(vector_rows, lexical_rows)
+        # Papers only the lexical stage found still get a real cosine score.
+        cosine = np.asarray(self.embeddings[rows], dtype=np.float32) @ query_embedding
+        if self.fusion == "rrf":
+            fused = np.zeros(len(rows), dtype=np.float64)
+            fused[np.searchsorted(rows, vector_rows)] += 1.0 / (RRF_K + np.arange(1, len(vector_rows) + 1))
+            fused[np.searchsorted(rows, lexical_rows)] += 1.0 / (RRF_K + np.arange(1, len(lexical_rows) + 1))
+        else:
+            bm25 = np.zeros(len(rows), dtype=np.float64)
+            bm25[np.searchsorted(rows, lexical_rows)] = lexical_scores / lexical_scores.max()
+            fused = self.semantic_weight * cosine + (1 - self.semantic_weight) * bm25
+
+        order = np.lexsort((-cosine, -fused))[:top_k]
+        return cosine[order], rows[order]
+
+    def cache_stats(self):
+        return {
+            "query_embeddings": QUERY_EMBEDDING_CACHE.stats(),
+            "results": RESULT_CACHE.stats(),
+        }
+
+    def search_fused(self, queries: List[str], top_k: int = 50, rrf_k: int = RRF_K,
+                     filters: Optional[Dict[str, List[str]]] = None) -> pd.DataFrame:
+        # Reciprocal-rank fusion across queries; similarity_score keeps the best
+        # cosine similarity any single query gave the paper.
+        fused_scores = {}
+        best_similarity = {}
+        for result in self.search_many(queries, top_k=top_k, filters=filters):
+            for rank, (label, similarity) in enumerate(zip(result.index, result['similarity_score'])):
+                fused_scores[label] = fused_scores.get(label, 0.0) + 1.0 / (rrf_k + rank + 1)
+                best_similarity[label] = max(best_similarity.get(label, -1.0), float(similarity))
 
-        query_embedding = self.model.encode([query])
-        similarities = cosine_similarity(query_embedding, self.embeddings)[0]
-        
-        top_indices = np.argsort(similarities)[::-1][:top_k]
-        
-        results = self.df.iloc[top_indices].copy()
-        results['similarity_score'] = similarities[top_indices]
-        
+        labels = sorted(fused_scores, key=lambda label: (fused_scores[label], best_similarity[label]), reverse=True)[:top_k]
+        results = self.df.loc[labels].copy()
+        results['similarity_score'] = [best_similarity[label] for label in labels]
+        results['fused_score'] = [fused_scores[label] for label in labels]
         return results
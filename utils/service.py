@@ -0,0 +1,443 @@
+import argparse
+import contextlib
+import json
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from utils.data_fetcher import CONFERENCE_MAP, get_cached_conferences
+from utils.facet_index import FACET_FIELDS, normalize_filters
+from utils.registry import EngineLease, EngineRegistry, get_registry
+
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 16
+# Queries arriving within MAX_BATCH_WAIT of each other are encoded and scored
+# together with one search_many call.
+MAX_BATCH = 32
+MAX_BATCH_WAIT = 0.003
+MAX_TOP_K = 500
+# Seconds an idle or stalled connection may hold a request worker.
+REQUEST_TIMEOUT = 30
+RESULT_COLUMNS = ['id', 'title', 'authors', 'keywords', 'pdf_url', 'similarity_score']
+
+def papers_to_records(df: pd.DataFrame, columns: List[str] = RESULT_COLUMNS) -> List[Dict]:
+    columns = [column for column in columns if column in df.columns]
+    records = df[columns].to_dict('records')
+    for record in records:
+        if 'similarity_score' in record:
+            record['similarity_score'] = float(record['similarity_score'])
+    return records
+
+# Collects queries for one search engine from many request threads and runs
+# them as micro-batches on a single thread, so concurrent requests share one
+# model.encode call and one matrix product instead of queueing for the CPU
+# one by one. A batch is sent as soon as it is full or the oldest query has
+# waited max_wait seconds.
+class QueryBatcher:
+    def __init__(self, engine, max_batch: int = MAX_BATCH, max_wait: float = MAX_BATCH_WAIT):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.queries = 0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="catalogger-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, query: str, top_k: int, filters: Optional[Dict[str, List[str]]] = None) -> Future:
+        future = Future()
+        self._queue.put((query, top_k, filters, future))
+        return future
+
+    def search(self, query: str, top_k: int, filters: Optional[Dict[str, List[str]]] = None) -> pd.DataFrame:
+        return self.submit(query, top_k, filters).result()
+
+    def close(self):
+        self._queue.put(None)
+
+    def _collect(self, first: tuple) -> List[tuple]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            self.batches += 1
+            self.queries += len(batch)
+            # Queries sharing top_k and filters go through one search_many call.
+            groups: Dict[tuple, List[tuple]] = {}
+            for item in batch:
+                try:
+                    key = (item[1], normalize_filters(item[2]))
+                except Exception as e:
+                    item[3].set_exception(e)
+                    continue
+                groups.setdefault(key, []).append(item)
+            for items in groups.values():
+                _, top_k, filters, _ = items[0]
+                try:
+                    results = self.engine.search_many([query for query, _, _, _ in items], top_k=top_k, filters=filters)
+                except Exception as e:
+                    for _, _, _, future in items:
+                        future.set_exception(e)
+                    continue
+                for (_, _, _, future), result in zip(items, results):
+                    future.set_result(result)
+
+class ServiceError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+# Headless access to search and recommendations. Holds one lease (so one warm
+# index) per conference from the shared registry for as long as the service
+# runs, with a QueryBatcher in front of each.
+class SearchService:
+    def __init__(self, registry: Optional[EngineRegistry] = None, max_batch: int = MAX_BATCH,
+                 max_wait: float = MAX_BATCH_WAIT):
+        self.registry = registry or get_registry()
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.leases: Dict[str, EngineLease] = {}
+        self.batchers: Dict[str, QueryBatcher] = {}
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+
+    def batcher(self, conference_name: str) -> QueryBatcher:
+        batcher = self.batchers.get(conference_name)
+        if batcher is not None:
+            return batcher
+        if conference_name not in CONFERENCE_MAP:
+            raise ServiceError(404, f"Unknown conference: {conference_name}")
+        with self._lock:
+            loading = self._loading.setdefault(conference_name, threading.Lock())
+        with loading:
+            if conference_name not in self.batchers:
+                lease = self.registry.acquire(conference_name)
+                self.leases[conference_name] = lease
+                self.batchers[conference_name] = QueryBatcher(lease.engine, self.max_batch, self.max_wait)
+        return self.batchers[conference_name]
+
+    def preload(self, conferences: List[str]):
+        for conference_name in conferences:
+            start = time.perf_counter()
+            self.batcher(conference_name)
+            print(f"Loaded {conference_name} in {time.perf_counter() - start:.1f}s")
+
+    def search(self, conference_name: str, queries: List[str], top_k: int = 50,
+               filters: Optional[Dict[str, List[str]]] = None) -> List[pd.DataFrame]:
+        if not 1 <= top_k <= MAX_TOP_K:
+            raise ServiceError(400, f"top_k must be between 1 and {MAX_TOP_K}")
+        if filters is not None and not isinstance(filters, dict):
+            raise ServiceError(400, "filters must be an object mapping a facet to a list of values")
+        unknown = [facet for facet in (filters or {}) if facet not in FACET_FIELDS]
+        if unknown:
+            raise ServiceError(400, f"Unknown facet: {unknown[0]}. Choose from {', '.join(FACET_FIELDS)}")
+        for facet, values in (filters or {}).items():
+            if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+                raise ServiceError(400, f"Facet {facet} must be a list of strings")
+        batcher = self.batcher(conference_name)
+        futures = [batcher.submit(query, top_k, filters) for query in queries]
+        return [future.result() for future in futures]
+
+    def recommend(self, conference_name: str, query: str, provider: str, api_key: str, top_k: int = 50,
+                  filters: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+        from utils.enrichment import paper_url
+        from utils.json_stream import JsonArrayParser
+        from utils.llm_interface import get_llm
+
+        if not api_key:
+            raise ServiceError(400, "An LLM API key is required (X-LLM-API-Key header or CATALOGGER_LLM_API_KEY)")
+        candidates = self.search(conference_name, [query], top_k, filters)[0]
+        if candidates.empty:
+            return []
+        reply = get_llm(provider, api_key).analyze_papers(candidates, query)
+        if reply.startswith("Error"):
+            raise ServiceError(502, reply)
+        recommendations = JsonArrayParser().feed(reply)
+        if not recommendations:
+            raise ServiceError(502, "The LLM reply contained no recommendations that could be parsed")
+        for recommendation in recommendations:
+            recommendation['url'] = paper_url(recommendation, candidates)
+        return recommendations
+
+    def stats(self) -> Dict:
+        return {
+            "engines": self.registry.stats(),
+            "batching": {
+                name: {"batches": batcher.batches, "queries": batcher.queries}
+                for name, batcher in self.batchers.items()
+            },
+        }
+
+    def close(self):
+        for batcher in self.batchers.values():
+            batcher.close()
+        for lease in self.leases.values():
+            lease.release()
+        self.batchers = {}
+        self.leases = {}
+
+# HTTP/JSON front end:
+#   GET  /health                              -> {"status": "ok", ...stats}
+#   GET  /conferences                         -> {"cached": {name: papers}, "loaded": [...]}
+#   GET  /search?q=&conference=&top_k=&keywords=&authors=
+#                                             -> {"results": [paper, ...]}
+#   POST /search {"queries": [...], "conference", "top_k", "filters"}
+#                                             -> {"results": [[paper, ...], ...]}
+#   POST /recommend {"query", "conference", "provider", "top_k", "filters"}
+#                                             -> {"recommendations": [...]}
+# filters maps a facet ("keywords", "authors") to a list of values; the GET
+# form takes each facet as a repeatable parameter.
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    timeout = REQUEST_TIMEOUT
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise ServiceError(400, "Request body is not valid JSON")
+        if not isinstance(payload, dict):
+            raise ServiceError(400, "Request body must be a JSON object")
+        return payload
+
+    def _conference(self, value) -> str:
+        conference_name = value or self.server.default_conference
+        if not conference_name:
+            raise ServiceError(400, "conference is required")
+        return conference_name
+
+    def _handle(self, route):
+        try:
+            self._send_json(200, route())
+        except ServiceError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except (TypeError, ValueError) as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            print(f"Error handling {self.command} {self.path}: {e}")
+            self._send_json(500, {"error": str(e)})
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        multi = parse_qs(parsed.query)
+        params = {key: values[0] for key, values in multi.items()}
+        filters = {facet: multi[facet] for facet in FACET_FIELDS if facet in multi}
+        service: SearchService = self.server.service
+
+        if parsed.path == "/health":
+            self._handle(lambda: dict(status="ok", **service.stats()))
+        elif parsed.path == "/conferences":
+            self._handle(lambda: {"cached": get_cached_conferences(), "loaded": sorted(service.batchers)})
+        elif parsed.path == "/search":
+            def route():
+                if not params.get("q"):
+                    raise ServiceError(400, "q is required")
+                result = service.search(self._conference(params.get("conference")), [params["q"]], int(params.get("top_k", 50)),
+                                        filters or None)[0]
+                return {"results": papers_to_records(result)}
+            self._handle(route)
+        else:
+            self._send_json(404, {"error": f"Unknown route: {parsed.path}"})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        service: SearchService = self.server.service
+
+        if path == "/search":
+            def route():
+                payload = self._read_json()
+                queries = payload.get("queries") or ([payload["query"]] if payload.get("query") else [])
+                if not queries or not all(isinstance(query, str) for query in queries):
+                    raise ServiceError(400, "query or queries (a list of strings) is required")
+                results = service.search(self._conference(payload.get("conference")), queries, int(payload.get("top_k", 50)),
+                                         payload.get("filters"))
+                return {"results": [papers_to_records(result) for result in results]}
+            self._handle(route)
+        elif path == "/recommend":
+            def route():
+                payload = self._read_json()
+                if not payload.get("query"):
+                    raise ServiceError(400, "query is required")
+                api_key = self.headers.get("X-LLM-API-Key") or os.environ.get("CATALOGGER_LLM_API_KEY", "")
+                recommendations = service.recommend(
+                    self._conference(payload.get("conference")), payload["query"],
+                    payload.get("provider", "OpenRouter"), api_key, int(payload.get("top_k", 50)), payload.get("filters"),
+                )
+                return {"recommendations": recommendations}
+            self._handle(route)
+        else:
+            self._send_json(404, {"error": f"Unknown route: {path}"})
+
+# HTTPServer that hands each connection to a fixed pool of worker threads
+# rather than starting a thread per connection, so a burst of clients cannot
+# oversubscribe the CPU. A keep-alive connection holds its worker until the
+# client closes it or stays idle for REQUEST_TIMEOUT; connections beyond
+# `workers` wait for a free one. server_close() shuts down the open
+# connections so their workers return and the process can exit.
+class PooledHTTPServer(HTTPServer):
+    def __init__(self, address, service: SearchService, workers: int = DEFAULT_WORKERS,
+                 default_conference: Optional[str] = None):
+        super().__init__(address, ServiceHandler)
+        self.service = service
+        self.default_conference = default_conference
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="catalogger-http")
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        with self._connections_lock:
+            self._connections.add(request)
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._connections_lock:
+                self._connections.discard(request)
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        with self._connections_lock:
+            connections = list(self._connections)
+        for request in connections:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+def serve(host: str = "127.0.0.1", port: int = DEFAULT_PORT, conferences: Optional[List[str]] = None,
+          workers: int = DEFAULT_WORKERS, max_batch: int = MAX_BATCH, max_wait: float = MAX_BATCH_WAIT,
+          registry: Optional[EngineRegistry] = None) -> PooledHTTPServer:
+    # Loads the given conferences and returns a bound server; call
+    # serve_forever() on it (the CLI does) or run it on a thread.
+    service = SearchService(registry, max_batch=max_batch, max_wait=max_wait)
+    service.preload(conferences or [])
+    default_conference = conferences[0] if conferences else None
+    return PooledHTTPServer((host, port), service, workers=workers, default_conference=default_conference)
+
+def _print_results(results: pd.DataFrame, as_json: bool):
+    if as_json:
+        print(json.dumps(papers_to_records(results), indent=2))
+        return
+    for rank, paper in enumerate(papers_to_records(results), 1):
+        print(f"{rank:3d}. [{paper['similarity_score']:.3f}] {paper['title']}")
+        print(f"     {paper['authors']}")
+        print(f"     {paper['pdf_url']}")
+
+def add_filter_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--keyword", action="append", default=[], help="only papers with this keyword (repeatable: any of them)")
+    parser.add_argument("--author", action="append", default=[], help="only papers by this author (repeatable: any of them)")
+
+def filter_arguments(args) -> Optional[Dict[str, List[str]]]:
+    filters = {"keywords": args.keyword, "authors": args.author}
+    return {facet: values for facet, values in filters.items() if values} or None
+
+def main():
+    parser = argparse.ArgumentParser(description="Search cached conferences without the Streamlit UI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="run the HTTP/JSON search service")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--conference", action="append", default=[],
+                              help="conference to load at startup (repeatable); the first is the default")
+    serve_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="request worker threads")
+    serve_parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="max queries per search batch")
+    serve_parser.add_argument("--batch-wait-ms", type=float, default=MAX_BATCH_WAIT * 1000,
+                              help="how long a query waits for others to batch with")
+
+    search_parser = commands.add_parser("search", help="run one search and print the results")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--conference", required=True)
+    search_parser.add_argument("--top-k", type=int, default=10)
+    search_parser.add_argument("--json", action="store_true", help="print results as JSON")
+    add_filter_arguments(search_parser)
+
+    recommend_parser = commands.add_parser("recommend", help="search, then ask the LLM for recommendations")
+    recommend_parser.add_argument("query")
+    recommend_parser.add_argument("--conference", required=True)
+    recommend_parser.add_argument("--provider", default="OpenRouter", choices=["Google Gemini", "OpenRouter"])
+    recommend_parser.add_argument("--top-k", type=int, default=50)
+    add_filter_arguments(recommend_parser)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        server = serve(args.host, args.port, args.conference, workers=args.workers,
+                       max_batch=args.max_batch, max_wait=args.batch_wait_ms / 1000)
+        print(f"Serving on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            server.service.close()
+        return
+
+    service = SearchService()
+    try:
+        if args.command == "search":
+            # Progress messages go to stderr so --json output stays parseable.
+            with contextlib.redirect_stdout(sys.stderr):
+                results = service.search(args.conference, [args.query], args.top_k, filter_arguments(args))[0]
+            _print_results(results, args.json)
+        else:
+            recommendations = service.recommend(args.conference, args.query, args.provider,
+                                                os.environ.get("CATALOGGER_LLM_API_KEY", ""), args.top_k,
+                                                filter_arguments(args))
+            print(json.dumps(recommendations, indent=2))
+    except ServiceError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        service.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# CATALOGGER_TRACE=1 turns tracing on by default (the app also has a toggle);
+# finished traces are appended to CATALOGGER_TRACE_FILE as JSON lines, one
+# span per line, in the OpenTelemetry JSON span layout.
+TRACE_ENABLED = os.environ.get("CATALOGGER_TRACE", "").lower() in ("1", "true", "yes", "on")
+TRACE_FILE = os.environ.get("CATALOGGER_TRACE_FILE", os.path.join("data", "traces.jsonl"))
+
+_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("catalogger_trace", default=None)
+_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("catalogger_span", default=None)
+_export_lock = threading.Lock()
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent: Optional["Span"], attributes: Dict):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_otel(self) -> Dict:
+        return {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otel_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": "STATUS_CODE_ERROR", "message": self.error} if self.error else {"code": "STATUS_CODE_OK"},
+        }
+
+class _NoopSpan:
+    def set(self, key: str, value):
+        pass
+
+_NOOP = _NoopSpan()
+
+def _otel_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+# Collects the spans of one traced operation, including spans finished on
+# worker threads that were started with propagate().
+class Trace:
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def rows(self) -> List[Dict]:
+        # Spans in start order with their nesting depth, for display.
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+        if not spans:
+            return []
+        depth = {}
+        origin = spans[0].start_ns
+        rows = []
+        for s in spans:
+            depth[s.span_id] = depth.get(s.parent_id, -1) + 1
+            rows.append({
+                "span": "  " * depth[s.span_id] + s.name,
+                "start_ms": (s.start_ns - origin) / 1e6,
+                "duration_ms": s.duration_ms,
+                "attributes": ", ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in s.attributes.items()),
+                "error": s.error or "",
+            })
+        return rows
+
+    def export(self, path: Optional[str] = TRACE_FILE):
+        if not path:
+            return
+        with self._lock:
+            lines = [json.dumps(s.to_otel()) for s in self.spans]
+        if not lines:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with _export_lock, open(path, 'a') as f:
+            f.write("\n".join(lines) + "\n")
+
+def active() -> bool:
+    return _trace.get() is not None
+
+def current_span():
+    # The innermost open span, or a no-op one outside a trace; lets a
+    # @traced function add attributes to its own span.
+    current = _span.get()
+    return current if current is not None and _trace.get() is not None else _NOOP
+
+@contextmanager
+def start_trace(name: str, enabled: bool = True, export_path: Optional[str] = TRACE_FILE):
+    # Spans are only recorded inside a trace, so code outside one (or with
+    # tracing switched off) pays for a single context variable lookup.
+    if not enabled:
+        yield None
+        return
+    trace = Trace(name)
+    token = _trace.set(trace)
+    try:
+        with span(name):
+            yield trace
+    finally:
+        _trace.reset(token)
+        trace.export(export_path)
+
+@contextmanager
+def span(name: str, **attributes):
+    trace = _trace.get()
+    if trace is None:
+        yield _NOOP
+        return
+    current = Span(trace, name, _span.get(), attributes)
+    token = _span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _span.reset(token)
+        trace.add(current)
+
+def record(name: str, start_ns: int, end_ns: Optional[int] = None, error: Optional[str] = None, **attributes):
+    # Adds an already finished span under the current one, for code that
+    # cannot hold a span open across its work, such as a generator that
+    # yields back to its caller between chunks.
+    trace = _trace.get()
+    if trace is None:
+        return
+    finished = Span(trace, name, _span.get(), attributes)
+    finished.start_ns = start_ns
+    finished.end_ns = end_ns if end_ns is not None else time.time_ns()
+    finished.error = error
+    trace.add(finished)
+
+def traced(name: str):
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _trace.get() is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def propagate(fn: Callable) -> Callable:
+    # Wraps fn so that, on whichever pool thread runs it, spans attach to the
+    # caller's trace and current span.
+    trace = _trace.get()
+    if trace is None:
+        return fn
+    parent = _span.get()
+
+    def run(*args, **kwargs):
+        trace_token = _trace.set(trace)
+        span_token = _span.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _span.reset(span_token)
+            _trace.reset(trace_token)
+    return run
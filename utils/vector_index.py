@@ -0,0 +1,122 @@
+import json
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+INDEX_BACKENDS = ("exact", "hnsw")
+
+def top_k_rows(scores: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    # argpartition is O(n) per query; only the k survivors get sorted.
+    top_k = min(top_k, scores.shape[1])
+    if top_k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.float32), empty.astype(np.int64)
+    if top_k < scores.shape[1]:
+        candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+    else:
+        candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind='stable')
+    return np.take_along_axis(candidate_scores, order, axis=1), np.take_along_axis(candidates, order, axis=1)
+
+def search_rows(embeddings: np.ndarray, query_vectors: np.ndarray, rows: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Exact search restricted to the given rows: only those are scored.
+    scores = np.asarray(query_vectors, dtype=np.float32) @ np.asarray(embeddings[rows], dtype=np.float32).T
+    top_scores, positions = top_k_rows(scores, top_k)
+    return top_scores, rows[positions]
+
+# All indexes take L2-normalized float32 query vectors of shape (n_queries, dim)
+# and return (scores, row indices), both shaped (n_queries, top_k) and sorted by
+# descending cosine similarity. Passing rows (sorted row ids) restricts the
+# search to those rows.
+class ExactIndex:
+    backend = "exact"
+
+    def __init__(self, embeddings: np.ndarray):
+        # float32 memmaps pass through untouched; float16 stores are upcast once
+        # here instead of on every query.
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+
+    def __len__(self):
+        return self.embeddings.shape[0]
+
+    def search(self, query_vectors: np.ndarray, top_k: int, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        if rows is not None:
+            return search_rows(self.embeddings, query_vectors, rows, top_k)
+        scores = np.asarray(query_vectors, dtype=np.float32) @ self.embeddings.T
+        return top_k_rows(scores, top_k)
+
+class HNSWIndex:
+    backend = "hnsw"
+
+    def __init__(self, index, rows: int, ef_search: int = 128):
+        self.index = index
+        self.rows = rows
+        self.ef_search = ef_search
+
+    def __len__(self):
+        return self.rows
+
+    @classmethod
+    def load_or_build(cls, embeddings: np.ndarray, path: str, version: str, M: int = 16, ef_construction: int = 200, ef_search: int = 128):
+        if hnswlib is None:
+            raise ImportError("The 'hnsw' index backend requires hnswlib (pip install hnswlib).")
+        rows, dim = embeddings.shape
+        meta_path = path + ".json"
+        meta = {"version": version, "rows": int(rows), "dim": int(dim), "M": M, "ef_construction": ef_construction}
+
+        index = hnswlib.Index(space='ip', dim=dim)
+        if os.path.exists(path) and os.path.exists(meta_path):
+            try:
+                with open(meta_path, 'r') as f:
+                    if json.load(f) == meta:
+                        index.load_index(path, max_elements=rows)
+                        index.set_ef(max(ef_search, 1))
+                        return cls(index, rows, ef_search)
+            except (OSError, ValueError, RuntimeError) as e:
+                print(f"Rebuilding HNSW index at {path}: {e}")
+
+        print(f"Building HNSW index for {rows} vectors...")
+        index.init_index(max_elements=max(rows, 1), ef_construction=ef_construction, M=M)
+        if rows:
+            index.add_items(np.asarray(embeddings, dtype=np.float32), np.arange(rows))
+        index.set_ef(max(ef_search, 1))
+
+        tmp_path = path + ".tmp"
+        index.save_index(tmp_path)
+        os.replace(tmp_path, path)
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        return cls(index, rows, ef_search)
+
+    def search(self, query_vectors: np.ndarray, top_k: int, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # With rows, the graph walk skips everything else. It can come up
+        # short of top_k when the rows are a small part of the index, in which
+        # case hnswlib raises RuntimeError; SearchEngine scores small subsets
+        # exactly instead.
+        top_k = min(top_k, self.rows if rows is None else len(rows))
+        if top_k <= 0:
+            empty = np.empty((len(query_vectors), 0))
+            return empty.astype(np.float32), empty.astype(np.int64)
+        self.index.set_ef(max(self.ef_search, top_k))
+        kwargs = {}
+        if rows is not None:
+            allowed = np.zeros(self.rows, dtype=bool)
+            allowed[rows] = True
+            kwargs = {"filter": lambda label: bool(allowed[label]), "num_threads": 1}
+        labels, distances = self.index.knn_query(np.asarray(query_vectors, dtype=np.float32), k=top_k, **kwargs)
+        # hnswlib's 'ip' space reports 1 - dot product as the distance.
+        return (1.0 - distances).astype(np.float32), labels.astype(np.int64)
+
+def build_index(backend: str, embeddings: np.ndarray, path: str, version: str, **kwargs):
+    if backend == "exact":
+        return ExactIndex(embeddings)
+    if backend == "hnsw":
+        return HNSWIndex.load_or_build(embeddings, path, version, **kwargs)
+    raise ValueError(f"Unknown index backend: {backend}. Choose from {', '.join(INDEX_BACKENDS)}")